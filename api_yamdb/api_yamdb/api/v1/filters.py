@@ -1,4 +1,5 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 from reviews.models import Title
 
 
@@ -11,3 +12,17 @@ class TitleFilter(filters.FilterSet):
     class Meta:
         model = Title
         fields = ['category', 'genre', 'name', 'year']
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Сортировка с id последним ключом: при равных значениях, например
+    рейтинге 0 у произведений без отзывов, страницы не перемешиваются,
+    а сортировка по rating идёт по индексу (rating, id).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or {'id', '-id', 'pk', '-pk'} & set(ordering):
+            return ordering
+        return [*ordering, '-id' if ordering[0].startswith('-') else 'id']
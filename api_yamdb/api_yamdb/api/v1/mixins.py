@@ -1,10 +1,33 @@
+from api_yamdb.timing import TimingMixin
+from django.shortcuts import get_object_or_404
 from rest_framework import mixins, viewsets
 
 
 class CreateListDestroyViewSet(
+    TimingMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
     viewsets.GenericViewSet
 ):
     pass
+
+
+class ParentObjectMixin:
+    """
+    Родительский объект вложенного маршрута, один запрос к БД на запрос.
+
+    parent_queryset фильтруется по parent_lookups (поле -> аргумент URL),
+    поэтому объект, не входящий в родителя из URL, даёт 404.
+    """
+    parent_queryset = None
+    parent_lookups = {}
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(
+                self.parent_queryset,
+                **{field: self.kwargs.get(kwarg)
+                   for field, kwarg in self.parent_lookups.items()}
+            )
+        return self._parent
@@ -1,6 +1,6 @@
 import datetime
 
-from django.core.exceptions import ValidationError
+from django.conf import settings
 from rest_framework import serializers
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
@@ -24,7 +24,7 @@ class TitleSerializer(serializers.ModelSerializer):
                                          slug_field='slug', many=True)
     category = serializers.SlugRelatedField(queryset=Category.objects.all(),
                                             slug_field='slug')
-    rating = serializers.IntegerField(read_only=True)
+    rating = serializers.SerializerMethodField()
 
     class Meta:
         fields = ('id', 'name', 'year', 'rating',
@@ -38,6 +38,11 @@ class TitleSerializer(serializers.ModelSerializer):
 
         return response
 
+    def get_rating(self, obj):
+        if not obj.review_count:
+            return None
+        return int(obj.rating)
+
     def validate_year(self, value):
         year = datetime.datetime.now().year
         if value > year:
@@ -84,29 +89,23 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context.get('view').kwargs.get('title_id')
-
-        if (
-            request.method == 'POST'
-            and Review.objects.filter(title=title_id, author=author).exists()
-        ):
-            raise ValidationError('Вы можете оставить только один отзыв!')
-
-        return data
-
     class Meta:
         model = Review
         fields = '__all__'
 
 
+class CommentReviewField(serializers.RelatedField):
+    """Полный текст отзыва или, с COMMENT_REVIEW_COMPACT, id и его
+    начало."""
+
+    def to_representation(self, value):
+        if settings.COMMENT_REVIEW_COMPACT:
+            return {'id': value.id, 'text': value.get_text()}
+        return value.text
+
+
 class CommentSerializer(serializers.ModelSerializer):
-    review = serializers.SlugRelatedField(
-        slug_field='text',
-        read_only=True
-    )
+    review = CommentReviewField(read_only=True)
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
@@ -1,19 +1,22 @@
+from api_yamdb.timing import TimingMixin
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.tokens import AccessToken
 from reviews.models import Category, Genre, Review, Title, User
 
-from .filters import TitleFilter
-from .mixins import CreateListDestroyViewSet
+from .filters import StableOrderingFilter, TitleFilter
+from .mixins import CreateListDestroyViewSet, ParentObjectMixin
 from .permissions import IsAdmin, IsAdminOrReadOnly, IsModerAdminOrReadOnly
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, ReviewSerializer, SignupSerializer,
@@ -38,63 +41,68 @@ class CategoryViewSet(CreateListDestroyViewSet):
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class TitleViewSet(ModelViewSet):
+class TitleViewSet(TimingMixin, ModelViewSet):
     queryset = (Title.objects.
                 select_related('category').
                 prefetch_related('genre').
-                annotate(rating=Avg('reviews__score')).
                 order_by("id")
                 )
     serializer_class = TitleSerializer
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'year', 'name')
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(TimingMixin, ParentObjectMixin, ModelViewSet):
     """
     Обрабатывает запросы к рейтингам.
     """
     serializer_class = ReviewSerializer
     permission_classes = (IsModerAdminOrReadOnly,)
+    parent_queryset = Title.objects.all()
+    parent_lookups = {'pk': 'title_id'}
 
     def get_queryset(self):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id')
-        )
-        return title.reviews.select_related('title').all().order_by('id')
+        # Отзывы из связанного менеджера получают title без запросов.
+        return self.get_parent().reviews.select_related(
+            'author').order_by('id')
 
     def perform_create(self, serializer):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
-
-
-class CommentViewSet(ModelViewSet):
+        # Повторный отзыв отсекает ограничение unique review в БД;
+        # лишний запрос нужен только при ошибке, чтобы не выдать за
+        # повтор нарушение другого ограничения.
+        title = self.get_parent()
+        try:
+            serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            if not Review.objects.filter(
+                    title=title, author=self.request.user).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY:
+                    ['Вы можете оставить только один отзыв!']
+            })
+
+
+class CommentViewSet(TimingMixin, ParentObjectMixin, ModelViewSet):
     """
     Обрабатывает запросы к комментариям.
     """
     serializer_class = CommentSerializer
     permission_classes = (IsModerAdminOrReadOnly,)
+    parent_queryset = Review.objects.all()
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
 
     def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id')
-        )
-        return review.comments.select_related('review').all().order_by('id')
+        return self.get_parent().comments.select_related(
+            'author').order_by('id')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id')
-        )
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_parent())
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(TimingMixin, ModelViewSet):
     """
     Создает пользователя.
     """
@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'api_yamdb.timing.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -150,3 +151,14 @@ EMAIL_DO_NOT_REPLY = 'donotreply@yamdb.ru'
 AUTH_USER_MODEL = 'reviews.User'
 
 SYMBOLS_LIMIT = 30
+
+# Отзыв в комментарии: id и начало текста (Review.get_text) вместо
+# полного текста отзыва в каждом комментарии.
+COMMENT_REVIEW_COMPACT = os.getenv('COMMENT_REVIEW_COMPACT',
+                                   default='False') == 'True'
+
+# Сколько последних замеров запросов хранить для debug/timings/.
+REQUEST_TIMING_BUFFER = 1000
+# Подключить debug/timings/ независимо от DEBUG.
+REQUEST_TIMING_ENDPOINT = os.getenv('REQUEST_TIMING_ENDPOINT',
+                                    default='False') == 'True'
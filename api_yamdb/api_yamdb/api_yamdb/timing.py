@@ -0,0 +1,212 @@
+"""Замеры запросов: число SQL-запросов, время SQL, сериализации и view.
+
+TimingMiddleware считает запросы к БД и общее время, TimingMixin для
+DRF-представлений добавляет время view и сериализатора. Итог уходит в
+заголовок Server-Timing и в кольцевой буфер, сводку по которому
+отдаёт timing_stats по адресу debug/timings/ при
+REQUEST_TIMING_ENDPOINT.
+
+Соединения с БД у каждого потока свои, поэтому в ASGI-режиме запросы
+считаются, только если асинхронное представление подключает
+track_queries в потоке, где обращается к БД (как api.async_views в
+foodgram); у синхронных представлений под ASGI они не видны.
+"""
+import asyncio
+import threading
+from collections import deque
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class RequestTiming:
+    """Счётчики одного запроса, время в миллисекундах."""
+
+    __slots__ = ('route', 'queries', 'sql', 'serializer', 'view', 'total')
+
+    def __init__(self):
+        self.route = None
+        self.queries = 0
+        self.sql = 0.0
+        self.serializer = 0.0
+        self.view = 0.0
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += (perf_counter() - started) * 1000
+            self.queries += 1
+
+    def header(self):
+        return ', '.join((
+            f'db;dur={self.sql:.1f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer:.1f}',
+            f'view;dur={self.view:.1f}',
+            f'total;dur={self.total:.1f}',
+        ))
+
+
+class TimingBuffer:
+    """Кольцевой буфер последних замеров, общий для потоков процесса."""
+
+    def __init__(self, size):
+        self.records = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, timing):
+        record = (timing.route, timing.queries, timing.sql,
+                  timing.serializer, timing.view, timing.total)
+        with self.lock:
+            self.records.append(record)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.records)
+
+
+timing_buffer = TimingBuffer(getattr(settings, 'REQUEST_TIMING_BUFFER', 1000))
+
+
+def get_route(request):
+    """Имя маршрута: Класс.действие для вьюсетов, иначе имя url."""
+    match = request.resolver_match
+    if match is None:
+        return 'unresolved'
+    actions = getattr(match.func, 'actions', None)
+    if not actions:
+        return match.view_name or match._func_path
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{match.func.cls.__name__}.{action}'
+
+
+def track_queries(timing):
+    """Подключает timing ко всем соединениям текущего потока."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(timing))
+    return stack
+
+
+class TimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Как у MiddlewareMixin: так Django узнаёт асинхронный вызов.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timing = request.timing = RequestTiming()
+        started = perf_counter()
+        with track_queries(timing):
+            response = self.get_response(request)
+        return self.finish(request, response, started)
+
+    async def __acall__(self, request):
+        request.timing = RequestTiming()
+        started = perf_counter()
+        response = await self.get_response(request)
+        return self.finish(request, response, started)
+
+    @staticmethod
+    def finish(request, response, started):
+        timing = request.timing
+        timing.total = (perf_counter() - started) * 1000
+        timing.route = get_route(request)
+        # У потоковых ответов запросы при отдаче тела уже не учитываются.
+        response['Server-Timing'] = timing.header()
+        timing_buffer.add(timing)
+        return response
+
+
+class TimingMixin:
+    """Время view и сериализатора для DRF-представлений."""
+
+    def dispatch(self, request, *args, **kwargs):
+        started = perf_counter()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            timing = getattr(request, 'timing', None)
+            if timing is not None:
+                timing.view += (perf_counter() - started) * 1000
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        timing = getattr(self.request, 'timing', None)
+        if timing is None:
+            return serializer
+        to_representation = serializer.to_representation
+
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return to_representation(*args, **kwargs)
+            finally:
+                timing.serializer += (perf_counter() - started) * 1000
+
+        serializer.to_representation = timed
+        return serializer
+
+
+def percentile(values, share):
+    index = max(0, int(round(share * len(values))) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'p50': round(percentile(values, 0.5), 2),
+        'p95': round(percentile(values, 0.95), 2),
+        'max': round(values[-1], 2),
+    }
+
+
+def histogram(values):
+    counts = dict.fromkeys([f'<={bucket}' for bucket in BUCKETS_MS], 0)
+    counts['>1000'] = 0
+    for value in values:
+        for bucket in BUCKETS_MS:
+            if value <= bucket:
+                counts[f'<={bucket}'] += 1
+                break
+        else:
+            counts['>1000'] += 1
+    return counts
+
+
+def timing_stats(request):
+    """Сводка по маршрутам из буфера (при REQUEST_TIMING_ENDPOINT)."""
+    routes = {}
+    for route, queries, sql, serializer, view, total in (
+            timing_buffer.snapshot()):
+        routes.setdefault(route, []).append(
+            (queries, sql, serializer, view, total))
+    result = {}
+    for route, records in sorted(routes.items()):
+        queries, sql, serializer, view, total = zip(*records)
+        result[route] = {
+            'count': len(records),
+            'queries': summarize(queries),
+            'sql_ms': summarize(sql),
+            'serializer_ms': summarize(serializer),
+            'view_ms': summarize(view),
+            'total_ms': summarize(total),
+            'histogram_ms': histogram(total),
+        }
+    return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
@@ -41,6 +41,8 @@ class TitleAdmin(admin.ModelAdmin):
         'year',
         'category',
         'description',
+        'rating',
+        'review_count',
     )
     search_fields = ('name', 'genre',)
     list_filter = ('genre',)
@@ -0,0 +1,282 @@
+"""Загрузка CSV-файлов static/data в модели reviews.
+
+Файлы читаются потоково, внешние ключи записываются по id в поля
+*_id без запросов к связанным таблицам, строки вставляются пачками
+через bulk_create или COPY (PostgreSQL).
+
+Порядок файлов задаёт граф зависимостей по внешним ключам: файлы, чьи
+таблицы ни на что не ссылаются, загружаются параллельно в процессах
+со своими соединениями. Каждая пачка — отдельная транзакция, после неё
+число загруженных строк записывается в контрольную точку файла, и
+прерванная загрузка продолжается с места остановки.
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+from time import perf_counter
+
+import django
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+
+from .models import Category, Comment, Genre, Review, Title, User
+
+NULL = r'\N'
+
+# Модель, файл и переименование столбцов CSV в атрибуты модели.
+# Порядок — порядок зависимостей по внешним ключам.
+TABLES = (
+    (User, 'users.csv', {}),
+    (Category, 'category.csv', {}),
+    (Genre, 'genre.csv', {}),
+    (Title, 'titles.csv', {'category': 'category_id'}),
+    (Title.genre.through, 'genre_title.csv', {}),
+    (Review, 'review.csv', {'author': 'author_id'}),
+    (Comment, 'comments.csv', {'author': 'author_id'}),
+)
+TABLE_BY_FILE = {csv_file: (model, columns)
+                 for model, csv_file, columns in TABLES}
+
+
+class LoadError(Exception):
+    def __init__(self, csv_file, error):
+        super().__init__(f'{csv_file}: {error}')
+        self.csv_file = csv_file
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_instances(model, reader, names):
+    """Объекты модели по строкам CSV; пустое значение в поле с null=True
+    становится NULL."""
+    nullable = {field.attname for field in model._meta.concrete_fields
+                if field.null}
+    for row in reader:
+        yield model(**{
+            name: None if value == '' and name in nullable else value
+            for name, value in zip(names, row.values())
+        })
+
+
+@contextmanager
+def keep_auto_now(model, attnames=None):
+    """Сохраняет значения auto_now- и auto_now_add-полей из данных.
+
+    Иначе save и bulk_create подставляют в них текущее время. attnames
+    ограничивает набор полей (например, столбцами файла).
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if (getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False))
+        and (attnames is None or field.attname in attnames)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def copy_instances(model, instances):
+    """Вставка через COPY FROM STDIN со значениями, как у bulk_create."""
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for instance in instances:
+        values = (
+            field.get_db_prep_save(field.pre_save(instance, True),
+                                   connection)
+            for field in fields
+        )
+        writer.writerow([NULL if value is None else value
+                         for value in values])
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            "COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '{}')".format(
+                connection.ops.quote_name(model._meta.db_table),
+                ', '.join(connection.ops.quote_name(field.column)
+                          for field in fields),
+                NULL),
+            buffer
+        )
+
+
+class Checkpoint:
+    """Сколько строк файла уже в базе и загружен ли он целиком.
+
+    Хранит размер и время изменения файла: продолжать загрузку
+    изменившегося файла нельзя.
+    """
+
+    def __init__(self, directory, path):
+        self.file = os.path.join(directory, f'{os.path.basename(path)}.json')
+        stat = os.stat(path)
+        self.source = [stat.st_size, stat.st_mtime_ns]
+        self.rows = 0
+        self.done = False
+        # Точка уже была записана: часть строк может быть в базе.
+        self.resumed = False
+
+    def load(self):
+        try:
+            with open(self.file, encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return self
+        self.resumed = True
+        if data['source'] != self.source:
+            raise ValueError('файл изменился после начала загрузки, '
+                             'запустите загрузку заново с --fresh')
+        self.rows, self.done = data['rows'], data['done']
+        return self
+
+    def save(self):
+        # Запись через временный файл: прерывание не портит точку.
+        temporary = f'{self.file}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'source': self.source, 'rows': self.rows,
+                       'done': self.done}, file)
+        os.replace(temporary, self.file)
+
+
+def load_table(model, path, columns, batch_size, use_copy=False,
+               checkpoint=None):
+    """Загружает файл в таблицу модели, возвращает (строк, секунд).
+
+    С checkpoint пропускает уже загруженные строки и сохраняет прогресс
+    до первой вставки и после каждой пачки. Первая пачка после
+    продолжения вставляется с ignore_conflicts: она могла попасть в базу
+    до записи точки.
+    """
+    started = perf_counter()
+    loaded = 0
+    skip = checkpoint.rows if checkpoint else 0
+    resumed = checkpoint is not None and checkpoint.resumed
+    if checkpoint and not resumed:
+        checkpoint.save()
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)
+        names = [columns.get(name, name) for name in reader.fieldnames]
+        instances = iter_instances(model, islice(reader, skip, None), names)
+        with keep_auto_now(model, names):
+            for batch in batched(instances, batch_size):
+                ignore_conflicts = resumed and not loaded
+                with transaction.atomic():
+                    if use_copy and not ignore_conflicts:
+                        copy_instances(model, batch)
+                    else:
+                        model.objects.bulk_create(
+                            batch, ignore_conflicts=ignore_conflicts)
+                loaded += len(batch)
+                if checkpoint:
+                    checkpoint.rows += len(batch)
+                    checkpoint.save()
+    if checkpoint:
+        checkpoint.done = True
+        checkpoint.save()
+    return loaded, perf_counter() - started
+
+
+def load_file(csv_file, data_dir, checkpoint_dir, batch_size, use_copy):
+    """Загрузка одного файла из TABLES, в том числе в процессе пула."""
+    model, columns = TABLE_BY_FILE[csv_file]
+    path = os.path.join(data_dir, csv_file)
+    checkpoint = Checkpoint(checkpoint_dir, path).load()
+    if checkpoint.done:
+        return 0, 0.0
+    return load_table(model, path, columns, batch_size, use_copy,
+                      checkpoint)
+
+
+def dependencies(tables):
+    """Файл -> файлы таблиц, на которые ссылаются его внешние ключи."""
+    files = {model: csv_file for model, csv_file, _ in tables}
+    return {
+        csv_file: {files[field.related_model]
+                   for field in model._meta.concrete_fields
+                   if field.is_relation and field.related_model in files
+                   and field.related_model is not model}
+        for model, csv_file, _ in tables
+    }
+
+
+def init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def load_files(tables, workers, *args):
+    """Загружает файлы tables в порядке зависимостей.
+
+    Выдаёт (файл, (строк, секунд)) по мере завершения; файл ставится в
+    очередь, когда загружены все файлы, от которых он зависит.
+    Аргументы args передаются в load_file.
+    """
+    if workers <= 1:
+        # tables уже перечислены в порядке зависимостей.
+        for _, csv_file, _ in tables:
+            try:
+                yield csv_file, load_file(csv_file, *args)
+            except Exception as error:
+                raise LoadError(csv_file, error) from error
+        return
+
+    pending = dependencies(tables)
+    finished = set()
+    running = {}
+    # Процессы пула не должны унаследовать открытое соединение.
+    connections.close_all()
+    with ProcessPoolExecutor(workers, initializer=init_worker) as executor:
+        while pending or running:
+            for csv_file in [csv_file for csv_file, needed in pending.items()
+                             if needed <= finished]:
+                del pending[csv_file]
+                future = executor.submit(load_file, csv_file, *args)
+                running[future] = csv_file
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                csv_file = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as error:
+                    raise LoadError(csv_file, error) from error
+                finished.add(csv_file)
+                yield csv_file, result
+
+
+def clear_tables(models):
+    """Очищает таблицы в обратном порядке зависимостей.
+
+    Данные удаляются одним DELETE без сбора объектов и сигналов;
+    пользователей удаляет ORM, чтобы каскадно очистить связанные с ними
+    таблицы вне reviews.
+    """
+    with connection.cursor() as cursor:
+        for model in reversed(models):
+            if model is User:
+                model.objects.all().delete()
+                continue
+            cursor.execute('DELETE FROM {}'.format(
+                connection.ops.quote_name(model._meta.db_table)))
+
+
+def reset_sequences(models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
@@ -1,92 +1,80 @@
-import csv
+import os
+import shutil
+from time import perf_counter
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
-TABLES_NO_FK = {
-    User: 'users.csv',
-    Category: 'category.csv',
-    Genre: 'genre.csv',
-
-}
-
-TABLES_FK = {
-    Title: 'titles.csv',
-    Review: 'review.csv',
-    Comment: 'comments.csv',
-}
+from reviews.importer import (TABLES, LoadError, clear_tables, load_files,
+                              reset_sequences)
+from reviews.models import Title
 
 
 class Command(BaseCommand):
-    help = 'Load csv files to reviews models'
-
-    def handle(self, *args, **kwargs):
-        for klass in TABLES_NO_FK.keys():
-            klass.objects.all().delete()
-        for klass in TABLES_FK.keys():
-            klass.objects.all().delete()
-
-        for model, csv_file in TABLES_NO_FK.items():
-            with open(
-                f"{settings.BASE_DIR}/static/data/{csv_file}",
-                'r', encoding='utf-8'
-            ) as csv_files:
-                reader = csv.DictReader(csv_files)
-                model.objects.bulk_create(
-                    model(**data) for data in reader)
-
-        with open(
-            f"{settings.BASE_DIR}/static/data/titles.csv",
-            'r', encoding='utf-8'
-        ) as csv_file:
-            titles_reader = csv.DictReader(csv_file)
-            for title in titles_reader:
-                current_category = Category.objects.get(id=title['category'])
-                title.pop('category')
-                Title.objects.create(**title, category=current_category)
-
-        with open(
-            f"{settings.BASE_DIR}/static/data/genre_title.csv",
-            'r', encoding='utf-8'
-        ) as csv_file:
-            genres_titles_reader = csv.DictReader(csv_file)
-            for genre_title in genres_titles_reader:
-                current_genre = Genre.objects.get(id=genre_title['genre_id'])
-                current_title = Title.objects.get(id=genre_title['title_id'])
-                current_title.genre.add(current_genre)
-
-        with open(
-            f"{settings.BASE_DIR}/static/data/review.csv",
-            'r', encoding='utf-8'
-        ) as csv_file:
-            review_reader = csv.DictReader(csv_file)
-            for review in review_reader:
-
-                current_title = Title.objects.get(id=review['title_id'])
-                review.pop('title_id')
-
-                current_author = User.objects.get(id=review['author'])
-                review.pop('author')
-
-                Review.objects.create(
-                    **review,
-                    title=current_title,
-                    author=current_author)
-
-        with open(
-            f"{settings.BASE_DIR}/static/data/comments.csv",
-            'r', encoding='utf-8'
-        ) as csv_file:
-            comment_reader = csv.DictReader(csv_file)
-            for comment in comment_reader:
-                current_review = Review.objects.get(id=comment['review_id'])
-                comment.pop('review_id')
-
-                current_author = User.objects.get(id=comment['author'])
-                comment.pop('author')
-
-                Comment.objects.create(
-                    **comment,
-                    review=current_review,
-                    author=current_author)
+    help = ('Загружает csv-файлы в модели reviews: независимые таблицы '
+            'параллельно, с контрольными точками для продолжения '
+            'прерванной загрузки')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir', default=f'{settings.BASE_DIR}/static/data')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Вставлять через COPY FROM STDIN (только PostgreSQL).')
+        parser.add_argument(
+            '--workers', type=int, default=3,
+            help='Процессов для независимых таблиц (только PostgreSQL).')
+        parser.add_argument(
+            '--checkpoint-dir',
+            help='Каталог контрольных точек, по умолчанию '
+                 '<data-dir>/.csv_to_model.')
+        parser.add_argument(
+            '--fresh', action='store_true',
+            help='Начать заново, не продолжая прерванную загрузку.')
+
+    def handle(self, *args, **options):
+        use_copy = options['copy']
+        postgres = connection.vendor == 'postgresql'
+        if use_copy and not postgres:
+            raise CommandError('--copy поддерживается только в PostgreSQL.')
+        # SQLite не допускает одновременной записи из нескольких процессов.
+        workers = options['workers'] if postgres else 1
+        data_dir = options['data_dir']
+        checkpoint_dir = (options['checkpoint_dir']
+                          or os.path.join(data_dir, '.csv_to_model'))
+
+        started = perf_counter()
+        if options['fresh'] or not os.path.isdir(checkpoint_dir):
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            with transaction.atomic():
+                clear_tables([model for model, _, _ in TABLES])
+            os.makedirs(checkpoint_dir)
+        else:
+            self.stdout.write(
+                f'Продолжение загрузки по контрольным точкам '
+                f'{checkpoint_dir}')
+
+        total = 0
+        try:
+            for csv_file, (rows, seconds) in load_files(
+                    TABLES, workers, data_dir, checkpoint_dir,
+                    options['batch_size'], use_copy):
+                total += rows
+                self.stdout.write(
+                    f'{csv_file}: {rows} строк за {seconds:.2f} с '
+                    f'({rows / max(seconds, 1e-6):.0f} строк/с)')
+        except LoadError as error:
+            raise CommandError(
+                f'{error}. Загруженные пачки сохранены, повторный запуск '
+                f'продолжит загрузку.')
+
+        reset_sequences([model for model, _, _ in TABLES])
+        # Пакетная вставка не вызывает сигналы отзывов.
+        Title.objects.recompute_ratings(options['batch_size'])
+        shutil.rmtree(checkpoint_dir)
+        elapsed = perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {total} строк за {elapsed:.2f} с '
+            f'({total / max(elapsed, 1e-6):.0f} строк/с)'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = ('Сверяет рейтинг, сумму и число оценок произведений с '
+            'отзывами и исправляет расхождения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = Title.objects.recompute_ratings(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлены рейтинги произведений: {fixed}'))
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(title=OuterRef('pk')).order_by(
+    ).values('title')
+
+    def aggregate(expression):
+        return Coalesce(Subquery(
+            reviews.annotate(value=expression).values('value'),
+            output_field=models.IntegerField()
+        ), 0)
+
+    Title.objects.update(score_sum=aggregate(Sum('score')),
+                         review_count=aggregate(Count('pk')))
+    Title.objects.update(rating=Coalesce(
+        Cast('score_sum', FloatField())
+        / Cast(NullIf('review_count', 0), FloatField()),
+        0.0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20221109_2256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Число отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
 
 USER = "user"
 MODERATOR = "moderator"
@@ -82,6 +84,75 @@ class Category(models.Model):
         return self.name
 
 
+def rating_expression(score_sum, review_count):
+    """Средняя оценка в SQL; 0, если отзывов нет."""
+    return Coalesce(
+        Cast(score_sum, FloatField())
+        / Cast(NullIf(review_count, 0), FloatField()),
+        0.0
+    )
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def change_rating(self, title_id, score_delta, count_delta):
+        """Атомарно меняет сумму и число оценок и пересчитывает рейтинг.
+
+        Выражения SET вычисляются по значениям строки до обновления.
+        """
+        score_sum = F('score_sum') + score_delta
+        review_count = F('review_count') + count_delta
+        return self.filter(pk=title_id).update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=rating_expression(score_sum, review_count)
+        )
+
+    def with_actual_ratings(self):
+        """Фактические сумма и число оценок по таблице отзывов."""
+        reviews = Review.objects.filter(title=OuterRef('pk')).order_by(
+        ).values('title')
+
+        def aggregate(expression):
+            return Coalesce(Subquery(
+                reviews.annotate(value=expression).values('value'),
+                output_field=models.IntegerField()
+            ), 0)
+
+        return self.annotate(actual_score_sum=aggregate(Sum('score')),
+                             actual_review_count=aggregate(Count('pk')))
+
+    def recompute_ratings(self, batch_size=1000):
+        """Исправляет разошедшиеся рейтинги, возвращает число произведений."""
+        fields = ('score_sum', 'review_count', 'rating')
+        stale = []
+        fixed = 0
+        titles = self.with_actual_ratings().only('id', *fields).order_by()
+        for title in titles.iterator():
+            score_sum = title.actual_score_sum
+            review_count = title.actual_review_count
+            rating = score_sum / review_count if review_count else 0.0
+            actual = (score_sum, review_count)
+            if ((title.score_sum, title.review_count) == actual
+                    and abs(title.rating - rating) < 1e-9):
+                continue
+            title.score_sum = score_sum
+            title.review_count = review_count
+            title.rating = rating
+            stale.append(title)
+            if len(stale) >= batch_size:
+                self.model.objects.bulk_update(stale, fields)
+                fixed += len(stale)
+                stale = []
+        if stale:
+            self.model.objects.bulk_update(stale, fields)
+            fixed += len(stale)
+        return fixed
+
+
+RATING_FIELDS = frozenset(('score_sum', 'review_count', 'rating'))
+
+
 class Title(models.Model):
     name = models.CharField(
         max_length=256,
@@ -105,15 +176,50 @@ class Title(models.Model):
         related_name='titles',
         verbose_name="Категория"
     )
+    # Поддерживаются сигналами отзывов (reviews.signals), расхождения
+    # исправляет команда recompute_ratings.
+    score_sum = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Сумма оценок"
+    )
+    review_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Число отзывов"
+    )
+    rating = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name="Рейтинг"
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('name',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=('rating', 'id'), name='title_rating_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Рейтинг меняют только UPDATE из change_rating и
+        # recompute_ratings: значения, прочитанные до них, не пишутся.
+        if (not args and not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            skipped = RATING_FIELDS | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
 
 class Review(models.Model):
     title = models.ForeignKey(
@@ -157,6 +263,20 @@ class Review(models.Model):
     def __str__(self):
         return self.text[:settings.SYMBOLS_LIMIT]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Сохранённые произведение и оценка: по ним сигнал считает,
+        # насколько изменить рейтинг.
+        if 'title_id' in field_names and 'score' in field_names:
+            instance.rating_state = (instance.title_id, instance.score)
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Отзыв и рейтинг произведения меняются в одной транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def get_text(self):
         return self.text[:settings.SYMBOLS_LIMIT]
 
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Review, Title
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Фикстуры грузятся без сигналов: после них recompute_ratings.
+        return
+    old = getattr(instance, 'rating_state', None)
+    new = (instance.title_id, instance.score)
+    if created:
+        Title.objects.change_rating(instance.title_id, instance.score, 1)
+    elif old is None:
+        # Прежняя оценка неизвестна — пересчёт одного произведения.
+        Title.objects.filter(pk=instance.title_id).recompute_ratings()
+    elif old[0] == new[0]:
+        if old[1] != new[1]:
+            Title.objects.change_rating(new[0], new[1] - old[1], 0)
+    else:
+        Title.objects.change_rating(old[0], -old[1], -1)
+        Title.objects.change_rating(new[0], new[1], 1)
+    instance.rating_state = new
+
+
+@receiver(post_delete, sender=Review)
+def remove_title_rating(sender, instance, **kwargs):
+    title_id, score = getattr(instance, 'rating_state',
+                              (instance.title_id, instance.score))
+    Title.objects.change_rating(title_id, -score, -1)
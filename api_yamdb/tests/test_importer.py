@@ -0,0 +1,134 @@
+import csv
+
+import pytest
+from django.db import connection
+
+from reviews import importer
+from reviews.models import Category, Comment, Review, Title
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def categories(tmp_path):
+    write_csv(tmp_path / 'category.csv', ('id', 'name', 'slug'),
+              [(number, f'Категория {number}', f'category{number}')
+               for number in range(1, 8)])
+    checkpoints = tmp_path / 'checkpoints'
+    checkpoints.mkdir()
+    return str(tmp_path), str(checkpoints)
+
+
+@pytest.fixture
+def dataset(categories):
+    data_dir, _ = categories
+    write_csv(f'{data_dir}/users.csv', ('id', 'username', 'email', 'role'),
+              [(1, 'reader', 'reader@yamdb.ru', 'user'),
+               (2, 'critic', 'critic@yamdb.ru', 'moderator')])
+    write_csv(f'{data_dir}/genre.csv', ('id', 'name', 'slug'),
+              [(1, 'Драма', 'drama'), (2, 'Комедия', 'comedy')])
+    write_csv(f'{data_dir}/titles.csv', ('id', 'name', 'year', 'category'),
+              [(1, 'Фильм', 2000, 3), (2, 'Книга', 1990, '')])
+    write_csv(f'{data_dir}/genre_title.csv', ('id', 'title_id', 'genre_id'),
+              [(1, 1, 1), (2, 1, 2), (3, 2, 2)])
+    write_csv(f'{data_dir}/review.csv',
+              ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+              [(1, 1, 'Отзыв', 2, 8, '2019-09-24T21:08:21.567Z')])
+    write_csv(f'{data_dir}/comments.csv',
+              ('id', 'review_id', 'text', 'author', 'pub_date'),
+              [(1, 1, 'Комментарий', 1, '2019-09-25T10:00:00.000Z')])
+    return categories
+
+
+class TestImporter:
+
+    def test_dependencies(self):
+        assert importer.dependencies(importer.TABLES) == {
+            'users.csv': set(),
+            'category.csv': set(),
+            'genre.csv': set(),
+            'titles.csv': {'category.csv'},
+            'genre_title.csv': {'titles.csv', 'genre.csv'},
+            'review.csv': {'titles.csv', 'users.csv'},
+            'comments.csv': {'review.csv', 'users.csv'},
+        }
+
+    def test_tables_follow_dependencies(self):
+        loaded = set()
+        for csv_file, needed in importer.dependencies(
+                importer.TABLES).items():
+            assert needed <= loaded, (
+                f'Проверьте, что {csv_file} загружается после {needed}'
+            )
+            loaded.add(csv_file)
+
+    @pytest.mark.django_db
+    def test_resume_after_interrupted_batch(self, categories, monkeypatch):
+        save = importer.Checkpoint.save
+        calls = []
+
+        def crash_after_first_batch(checkpoint):
+            calls.append(checkpoint.rows)
+            if checkpoint.rows:
+                raise KeyboardInterrupt
+            save(checkpoint)
+
+        monkeypatch.setattr(importer.Checkpoint, 'save',
+                            crash_after_first_batch)
+        with pytest.raises(KeyboardInterrupt):
+            importer.load_file('category.csv', *categories, 3, False)
+        # Первая пачка в базе, а точка записана только до вставки.
+        assert calls == [0, 3]
+        assert Category.objects.count() == 3
+
+        monkeypatch.setattr(importer.Checkpoint, 'save', save)
+        assert importer.load_file('category.csv', *categories, 3,
+                                  False)[0] == 7
+        assert Category.objects.count() == 7
+        assert importer.load_file('category.csv', *categories, 3,
+                                  False)[0] == 0
+
+    def load_all(self, dataset, use_copy):
+        return dict(importer.load_files(importer.TABLES, 1, *dataset, 2,
+                                        use_copy))
+
+    def check_loaded(self):
+        film = Title.objects.get(pk=1)
+        assert film.category_id == 3, (
+            'Проверьте, что категория записывается по id из файла'
+        )
+        assert Title.objects.get(pk=2).category_id is None
+        assert sorted(film.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama']
+        review = Review.objects.get(pk=1)
+        assert (review.title_id, review.author_id) == (1, 2)
+        assert review.pub_date.isoformat() == (
+            '2019-09-24T21:08:21.567000+00:00'
+        ), 'Проверьте, что дата отзыва берётся из файла, а не текущая'
+        comment = Comment.objects.get(pk=1)
+        assert (comment.review_id, comment.author_id) == (1, 1)
+        assert comment.pub_date.isoformat() == '2019-09-25T10:00:00+00:00'
+
+    @pytest.mark.django_db
+    def test_load_files(self, dataset):
+        loaded = self.load_all(dataset, False)
+        assert {csv_file: rows for csv_file, (rows, _) in loaded.items()} == {
+            'users.csv': 2, 'category.csv': 7, 'genre.csv': 2,
+            'titles.csv': 2, 'genre_title.csv': 3, 'review.csv': 1,
+            'comments.csv': 1,
+        }
+        self.check_loaded()
+        # auto_now_add снова подставляет текущее время.
+        assert Review._meta.get_field('pub_date').auto_now_add
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql',
+                        reason='COPY есть только в PostgreSQL')
+    @pytest.mark.django_db
+    def test_load_files_with_copy(self, dataset):
+        self.load_all(dataset, True)
+        self.check_loaded()
@@ -0,0 +1,64 @@
+import pytest
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Comment, Review, Title, User
+
+PAGE_SIZE = 100
+
+
+@pytest.fixture
+def review(monkeypatch):
+    monkeypatch.setattr(PageNumberPagination, 'page_size', PAGE_SIZE)
+    category = Category.objects.create(name='Фильмы', slug='films')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    User.objects.bulk_create(
+        User(username=f'user{number}', email=f'user{number}@yamdb.ru')
+        for number in range(PAGE_SIZE)
+    )
+    users = User.objects.all()
+    Review.objects.bulk_create(
+        Review(title=title, author=user, text=f'Отзыв {user.username}',
+               score=5)
+        for user in users
+    )
+    review = Review.objects.filter(title=title).order_by('id').first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=user, text='Комментарий')
+        for user in users
+    )
+    return review
+
+
+@pytest.mark.django_db
+class TestQueries:
+
+    def test_reviews_list(self, review, django_assert_num_queries):
+        # Произведение, число отзывов, страница отзывов с авторами.
+        with django_assert_num_queries(3):
+            response = APIClient().get(
+                f'/api/v1/titles/{review.title_id}/reviews/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == PAGE_SIZE, (
+            'Проверьте, что на странице все отзывы'
+        )
+
+    def test_comments_list(self, review, django_assert_num_queries):
+        # Отзыв, число комментариев, страница комментариев с авторами.
+        with django_assert_num_queries(3):
+            response = APIClient().get(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+                f'/comments/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == PAGE_SIZE, (
+            'Проверьте, что на странице все комментарии'
+        )
+
+    def test_comment_review_compact(self, review, settings):
+        settings.COMMENT_REVIEW_COMPACT = True
+        response = APIClient().get(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+            f'/comments/')
+        assert response.json()['results'][0]['review'] == {
+            'id': review.id, 'text': review.get_text()
+        }
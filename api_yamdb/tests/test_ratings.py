@@ -0,0 +1,88 @@
+import pytest
+
+from reviews.models import Category, Review, Title, User
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильмы', slug='films')
+    return [
+        Title.objects.create(name=f'Фильм {number}', year=2000,
+                             category=category)
+        for number in range(2)
+    ]
+
+
+@pytest.fixture
+def authors():
+    return [
+        User.objects.create(username=f'author{number}',
+                            email=f'author{number}@yamdb.ru')
+        for number in range(2)
+    ]
+
+
+def rating(title):
+    title.refresh_from_db()
+    return title.score_sum, title.review_count, title.rating
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_create_edit_delete(self, titles, authors):
+        title = titles[0]
+        review = Review.objects.create(title=title, author=authors[0],
+                                       text='Отзыв', score=4)
+        Review.objects.create(title=title, author=authors[1],
+                              text='Отзыв', score=8)
+        assert rating(title) == (12, 2, 6.0)
+
+        review.score = 10
+        review.save()
+        assert rating(title) == (18, 2, 9.0)
+
+        review.delete()
+        assert rating(title) == (8, 1, 8.0)
+
+    def test_move_to_another_title(self, titles, authors):
+        review = Review.objects.create(title=titles[0], author=authors[0],
+                                       text='Отзыв', score=6)
+        review = Review.objects.get(pk=review.pk)
+        review.title = titles[1]
+        review.score = 2
+        review.save()
+        assert rating(titles[0]) == (0, 0, 0.0)
+        assert rating(titles[1]) == (2, 1, 2.0)
+
+    def test_cascade_delete_of_author(self, titles, authors):
+        for author, score in zip(authors, (3, 7)):
+            Review.objects.create(title=titles[0], author=author,
+                                  text='Отзыв', score=score)
+        authors[0].delete()
+        assert rating(titles[0]) == (7, 1, 7.0)
+
+    def test_title_save_keeps_rating(self, titles, authors):
+        stale = Title.objects.get(pk=titles[0].pk)
+        Review.objects.create(title=titles[0], author=authors[0],
+                              text='Отзыв', score=5)
+        stale.name = 'Новое название'
+        stale.save()
+        assert rating(titles[0]) == (5, 1, 5.0), (
+            'Проверьте, что сохранение произведения не затирает рейтинг'
+        )
+
+    def test_recompute_ratings(self, titles, authors):
+        Review.objects.bulk_create([
+            Review(title=titles[0], author=authors[0], text='Отзыв',
+                   score=4),
+            Review(title=titles[0], author=authors[1], text='Отзыв',
+                   score=9),
+        ])
+        Title.objects.filter(pk=titles[1].pk).update(
+            score_sum=5, review_count=1, rating=5)
+
+        assert Title.objects.recompute_ratings(batch_size=1) == 2
+        assert rating(titles[0]) == (13, 2, 6.5)
+        assert rating(titles[1]) == (0, 0, 0.0)
+        assert Title.objects.recompute_ratings() == 0
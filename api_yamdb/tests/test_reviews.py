@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Review, Title, User
+
+
+@pytest.fixture
+def user():
+    return User.objects.create(username='reviewer',
+                               email='reviewer@yamdb.ru')
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильмы', slug='films')
+    return [
+        Title.objects.create(name=f'Фильм {number}', year=2000,
+                             category=category)
+        for number in range(2)
+    ]
+
+
+@pytest.mark.django_db
+class TestNestedRoutes:
+
+    def test_review_create_and_duplicate(self, user_client, titles):
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.post(url, data)
+        assert response.status_code == 201, response.json()
+        # Произведение, вставка отзыва, обновление рейтинга; команды
+        # транзакций и точек сохранения не считаются.
+        statements = [query['sql'].split()[0] for query in queries
+                      if query['sql'].split()[0] not in (
+                          'BEGIN', 'SAVEPOINT', 'RELEASE')]
+        assert statements == ['SELECT', 'INSERT', 'UPDATE']
+
+        response = user_client.post(url, data)
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Вы можете оставить только один отзыв!']
+        }
+        assert Review.objects.count() == 1
+
+    def test_comment_review_from_another_title(self, user, user_client,
+                                                titles):
+        review = Review.objects.create(title=titles[0], author=user,
+                                       text='Отзыв', score=7)
+        url = f'/api/v1/titles/{{}}/reviews/{review.id}/comments/'
+
+        response = user_client.get(url.format(titles[1].id))
+        assert response.status_code == 404, (
+            'Проверьте, что отзыв другого произведения не найден'
+        )
+        response = user_client.post(url.format(titles[1].id),
+                                    {'text': 'Комментарий'})
+        assert response.status_code == 404
+        response = user_client.post(url.format(titles[0].id),
+                                    {'text': 'Комментарий'})
+        assert response.status_code == 201
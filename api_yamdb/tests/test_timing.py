@@ -0,0 +1,27 @@
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+from api_yamdb.timing import timing_buffer, timing_stats
+from reviews.models import Category, Title
+
+
+@pytest.mark.django_db
+class TestTiming:
+
+    def test_server_timing_and_stats(self, rf):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        Title.objects.create(name='Фильм', year=2000, category=category)
+        timing_buffer.records.clear()
+
+        response = APIClient().get('/api/v1/titles/')
+        header = response['Server-Timing']
+        assert 'db;dur=' in header and 'serializer;dur=' in header, (
+            'Проверьте, что ответ содержит заголовок Server-Timing'
+        )
+
+        data = json.loads(timing_stats(rf.get('/debug/timings/')).content)
+        assert data['TitleViewSet.list']['count'] == 1
+        assert data['TitleViewSet.list']['queries']['max'] > 0
+        assert sum(data['TitleViewSet.list']['histogram_ms'].values()) == 1
@@ -0,0 +1,22 @@
+import pytest
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Title
+
+
+@pytest.mark.django_db
+class TestTitles:
+
+    def test_rating_ordering_is_stable(self):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        Title.objects.bulk_create(
+            Title(name=f'Фильм {number}', year=2000, category=category)
+            for number in range(6)
+        )
+        ids = sorted(Title.objects.values_list('id', flat=True))
+        Title.objects.filter(id=ids[2]).update(rating=8, review_count=1)
+
+        response = APIClient().get('/api/v1/titles/?ordering=-rating')
+        assert [title['id'] for title in response.json()['results']] == [
+            ids[2], ids[5], ids[4], ids[3]
+        ], 'Проверьте, что при равном рейтинге произведения идут по id'
@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+from yatube_api.timing import timing_buffer, timing_stats
+
+
+class TestTiming:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_server_timing_and_stats(self, client, post, post_2, rf):
+        timing_buffer.records.clear()
+
+        response = client.get('/api/v1/posts/')
+        header = response['Server-Timing']
+        assert 'db;dur=' in header and 'serializer;dur=' in header, (
+            'Проверьте, что ответ содержит заголовок Server-Timing'
+        )
+
+        data = json.loads(timing_stats(rf.get('/debug/timings/')).content)
+        assert data['PostViewSet.list']['count'] == 1
+        assert data['PostViewSet.list']['queries']['max'] > 0
+        assert sum(data['PostViewSet.list']['histogram_ms'].values()) == 1
@@ -5,9 +5,10 @@ from .permissions import IsAuthorOrReadOnlyPermission
 from .serializers import PostSerializer, GroupSerializer
 from .serializers import CommentSerializer, FollowSerializer
 from posts.models import Post, Group, Comment
+from yatube_api.timing import TimingMixin
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(TimingMixin, viewsets.ModelViewSet):
     queryset = Post.objects.select_related(
         'author', 'group').prefetch_related('comments').all()
     serializer_class = PostSerializer
@@ -18,12 +19,12 @@ class PostViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user)
 
 
-class GroupViewSet(viewsets.ReadOnlyModelViewSet):
+class GroupViewSet(TimingMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(TimingMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.select_related('post').all()
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorOrReadOnlyPermission,)
@@ -38,7 +39,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, post=post_id)
 
 
-class FollowViewSet(viewsets.ModelViewSet):
+class FollowViewSet(TimingMixin, viewsets.ModelViewSet):
     serializer_class = FollowSerializer
     permission_classes = (permissions.IsAuthenticated,)
     filter_backends = (filters.SearchFilter,)
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube_api.timing.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -104,3 +105,9 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+
+# Сколько последних замеров запросов хранить для debug/timings/.
+REQUEST_TIMING_BUFFER = 1000
+# Подключить debug/timings/ независимо от DEBUG.
+REQUEST_TIMING_ENDPOINT = os.getenv('REQUEST_TIMING_ENDPOINT',
+                                    default='False') == 'True'
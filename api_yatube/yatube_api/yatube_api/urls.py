@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
 
+from .timing import timing_stats
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
@@ -11,3 +14,6 @@ urlpatterns = [
         name='redoc'
     ),
 ]
+
+if settings.REQUEST_TIMING_ENDPOINT:
+    urlpatterns += [path('debug/timings/', timing_stats)]
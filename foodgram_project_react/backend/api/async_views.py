@@ -0,0 +1,76 @@
+"""Чтение рецептов, тегов и ингредиентов в ASGI-режиме.
+
+Под ASGI Django выполняет синхронные представления в одном потоке на
+процесс, поэтому параллельные запросы к ним идут по очереди. Обёртка
+async_read_view делает представление асинхронным: GET, HEAD и OPTIONS
+выполняются в отдельном пуле из ASYNC_READ_THREADS потоков со своими
+соединениями с БД, а запись остаётся в общем потоке, как у остальных
+представлений. Медленные клиенты обслуживает цикл событий сервера,
+поток пула занят только на время работы представления.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram_api.timing import track_queries
+
+READ_ACTIONS = ('list', 'retrieve')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_READ_THREADS,
+                thread_name_prefix='async-read')
+        return _executor
+
+
+def run_view(view, request, args, kwargs):
+    """Выполняет представление и отрисовывает ответ в текущем потоке."""
+    timing = getattr(request, 'timing', None)
+    try:
+        with track_queries(timing) if timing else nullcontext():
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+    finally:
+        # Соединение потока пула закрывается по тем же правилам
+        # CONN_MAX_AGE, что и после обычного запроса.
+        close_old_connections()
+
+
+def async_read_view(view):
+    write_view = sync_to_async(partial(run_view, view), thread_sensitive=True)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await write_view(request, args, kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_executor(), run_view, view, request, args, kwargs)
+
+    return async_view
+
+
+def async_read_urls(urlpatterns, viewsets):
+    """Заменяет list/retrieve вьюсетов viewsets в urlpatterns роутера."""
+    for pattern in urlpatterns:
+        callback = pattern.callback
+        if (getattr(callback, 'cls', None) in viewsets
+                and callback.actions.get('get') in READ_ACTIONS):
+            pattern.callback = async_read_view(callback)
+    return urlpatterns
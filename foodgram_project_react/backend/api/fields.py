@@ -0,0 +1,145 @@
+import binascii
+import uuid
+from base64 import b64decode
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image
+from rest_framework import serializers
+
+ALLOWED_IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif'}
+# Заголовок вида data:image/png;base64, не длиннее этого.
+MAX_HEADER_LENGTH = 100
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+class Base64ImageWriter:
+    """Декодирует base64 по частям во временный файл на диске.
+
+    Размер файла проверяется на каждой части, размеры картинки — как
+    только Pillow сможет прочитать заголовок, то есть задолго до конца
+    загрузки. Нарушение лимитов — ValidationError.
+    """
+
+    def __init__(self):
+        self.file = TemporaryUploadedFile(
+            name='image', content_type=None, size=0, charset=None)
+        self.header = ''
+        self.in_header = True
+        self.tail = ''
+        self.size = 0
+        self.next_check = 1024
+        self.checked = False
+
+    def write(self, text):
+        if self.in_header:
+            text = self.skip_header(text)
+        text = self.tail + ''.join(text.split())
+        usable = len(text) - len(text) % 4
+        self.tail = text[usable:]
+        if usable:
+            self.decode(text[:usable])
+
+    def skip_header(self, text):
+        """Отрезает заголовок data URI, если он есть."""
+        self.header += text
+        if not 'data:'.startswith(self.header[:5]):
+            self.in_header = False
+            return self.header
+        if ',' in self.header:
+            self.in_header = False
+            return self.header.split(',', 1)[1]
+        if len(self.header) > MAX_HEADER_LENGTH:
+            raise serializers.ValidationError('Неверный формат изображения.')
+        return ''
+
+    def decode(self, text):
+        try:
+            data = b64decode(text, validate=True)
+        except (binascii.Error, ValueError):
+            self.close()
+            raise serializers.ValidationError('Неверный формат изображения.')
+        self.size += len(data)
+        if self.size > settings.RECIPE_IMAGE_MAX_BYTES:
+            self.close()
+            raise serializers.ValidationError(
+                'Изображение больше '
+                f'{settings.RECIPE_IMAGE_MAX_BYTES // (1024 * 1024)} МБ.')
+        self.file.write(data)
+        if not self.checked and self.size >= self.next_check:
+            self.next_check *= 4
+            self.check_dimensions(final=False)
+
+    def check_dimensions(self, final):
+        self.file.flush()
+        self.file.seek(0)
+        try:
+            image = Image.open(self.file)
+        except Exception:
+            if final:
+                self.close()
+                raise serializers.ValidationError(
+                    'Загрузите корректное изображение.')
+            return
+        finally:
+            self.file.seek(0, 2)
+        max_width, max_height = settings.RECIPE_IMAGE_MAX_DIMENSIONS
+        width, height = image.size
+        if (image.format not in ALLOWED_IMAGE_FORMATS
+                or width > max_width or height > max_height):
+            self.close()
+            raise serializers.ValidationError(
+                'Допустимы изображения JPEG, PNG и GIF не больше '
+                f'{max_width}x{max_height} пикселей.')
+        self.checked = True
+        self.file.name = (
+            f'{uuid.uuid4()}.{ALLOWED_IMAGE_FORMATS[image.format]}')
+        self.file.content_type = Image.MIME[image.format]
+
+    def finish(self):
+        """Готовый файл для ImageField."""
+        if self.in_header or self.tail:
+            self.close()
+            raise serializers.ValidationError('Неверный формат изображения.')
+        if not self.checked:
+            self.check_dimensions(final=True)
+        self.file.size = self.size
+        self.file.seek(0)
+        return self.file
+
+    def close(self):
+        self.file.close()
+
+
+class Base64ImageField(serializers.ImageField):
+    """Изображение в base64, в том числе в виде data URI.
+
+    Строку декодирует Base64ImageWriter частями во временный файл.
+    Потоковый парсер RecipeJSONParser делает то же самое ещё при чтении
+    тела запроса и передаёт сюда уже готовый файл.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data:
+            writer = Base64ImageWriter()
+            for start in range(0, len(data), DECODE_CHUNK_SIZE):
+                writer.write(data[start:start + DECODE_CHUNK_SIZE])
+            data = writer.finish()
+        return super().to_internal_value(data)
+
+
+class RecipeImageField(serializers.ImageField):
+    """Ссылка на копию изображения рецепта.
+
+    Пока копия строится в фоне, отдаётся ссылка на оригинал.
+    """
+
+    def __init__(self, rendition, **kwargs):
+        self.rendition = rendition
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return super().to_representation(
+            getattr(recipe, self.rendition) or recipe.image)
@@ -1,6 +1,7 @@
-from distutils.util import strtobool
 from django_filters import rest_framework
-from recipes.models import Recipe, Favorite, ShoppingCart, Tag
+from rest_framework.filters import BaseFilterBackend
+from recipes.models import Recipe, Tag
+from recipes.search import search_recipes
 
 
 CHOICES_LIST = (
@@ -8,6 +9,12 @@ CHOICES_LIST = (
     ('1', 'True')
 )
 
+# Порядок совпадает с индексом recipe_popularity_idx.
+ORDERINGS = {
+    '-popularity': ('-favorites_count', '-pub_date', '-id'),
+    'popularity': ('favorites_count', 'pub_date', 'id'),
+}
+
 
 class RecipeFilter(rest_framework.FilterSet):
     is_favorited = rest_framework.ChoiceFilter(
@@ -27,33 +34,48 @@ class RecipeFilter(rest_framework.FilterSet):
         to_field_name='slug',
         queryset=Tag.objects.all()
     )
+    ordering = rest_framework.ChoiceFilter(
+        choices=(
+            ('-popularity', 'Сначала популярные'),
+            ('popularity', 'Сначала непопулярные'),
+        ),
+        method='ordering_method'
+    )
 
     def is_favorited_method(self, queryset, name, value):
-        if self.request.user.is_anonymous:
-            return Recipe.objects.none()
-
-        favorites = Favorite.objects.filter(user=self.request.user)
-        recipes = [item.recipe.id for item in favorites]
-        new_queryset = queryset.filter(id__in=recipes)
-
-        if not strtobool(value):
-            return queryset.difference(new_queryset)
-
-        return queryset.filter(id__in=recipes)
+        return self.filter_user_flag(queryset, 'is_favorited', value)
 
     def is_in_shopping_cart_method(self, queryset, name, value):
-        if self.request.user.is_anonymous:
-            return Recipe.objects.none()
+        return self.filter_user_flag(queryset, 'is_in_shopping_cart', value)
 
-        shopping_cart = ShoppingCart.objects.filter(user=self.request.user)
-        recipes = [item.recipe.id for item in shopping_cart]
-        new_queryset = queryset.filter(id__in=recipes)
+    def ordering_method(self, queryset, name, value):
+        return queryset.order_by(*ORDERINGS[value])
 
-        if not strtobool(value):
-            return queryset.difference(new_queryset)
+    def filter_user_flag(self, queryset, flag, value):
+        """Фильтр по EXISTS / NOT EXISTS из RecipeQuerySet.with_user_flags."""
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.none()
 
-        return queryset.filter(id__in=recipes)
+        if flag not in queryset.query.annotations:
+            queryset = queryset.with_user_flags(user)
+        return queryset.filter(**{flag: value == '1'})
 
     class Meta:
         model = Recipe
         fields = ('author', 'tags')
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск ?search= с сортировкой по релевантности."""
+
+    # Не api_settings.SEARCH_PARAM: в проекте это ?name=, префикс
+    # названия в автодополнении ингредиентов. Полнотекстовый поиск
+    # рецептов — другая операция, и у неё свой параметр.
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        return search_recipes(queryset, term)
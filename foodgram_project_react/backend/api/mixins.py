@@ -0,0 +1,98 @@
+import hashlib
+import json
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def reference_cache():
+    return caches[settings.REFERENCE_CACHE_ALIAS]
+
+
+def reference_version_key(model):
+    return f'api:reference:version:{model._meta.label_lower}'
+
+
+def get_reference_version(model):
+    cache = reference_cache()
+    key = reference_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_reference_version(model):
+    reference_cache().set(reference_version_key(model), uuid4().hex, None)
+
+
+class CachedResponseMixin:
+    """Кеширует ответы list/retrieve и поддерживает условный GET.
+
+    Ключ кеша содержит версию модели вьюсета; версию меняют сигналы
+    сохранения и удаления (см. api.signals). Повторный запрос не
+    обращается к БД и не сериализует объекты, а при совпадении
+    If-None-Match отдаётся 304 без тела.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = reference_cache()
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = self.make_cache_entry(request, response.data)
+            cache.set(key, entry, settings.REFERENCE_CACHE_TIMEOUT)
+
+        etag, data = entry
+        if self.etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_response_cache_key(self, request):
+        version = get_reference_version(self.get_queryset().model)
+        return 'api:reference:{}:{}:{}:{}'.format(
+            self.basename, version, request.accepted_renderer.format,
+            request.get_full_path()
+        )
+
+    @staticmethod
+    def make_cache_entry(request, data):
+        content = json.dumps(data, cls=JSONEncoder, ensure_ascii=False,
+                             sort_keys=True)
+        digest = hashlib.sha1(
+            f'{request.accepted_renderer.format}:{content}'.encode()
+        ).hexdigest()
+        # В кеш кладутся простые списки/словари, а не ReturnList.
+        return f'"{digest}"', json.loads(content)
+
+    @staticmethod
+    def etag_matches(request, etag):
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return False
+        etags = parse_etags(header)
+        if '*' in etags:
+            return True
+        # If-None-Match сравнивается слабо: W/"x" совпадает с "x".
+        return any(tag.replace('W/', '', 1) == etag for tag in etags)
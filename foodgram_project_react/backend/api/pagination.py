@@ -0,0 +1,126 @@
+import base64
+import binascii
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from recipes.feed import get_feed_page
+
+
+class LimitPageNumberPagination(PageNumberPagination):
+    """Постраничная пагинация с размером страницы из ?limit=."""
+
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+def encode_cursor(pub_date, pk):
+    position = f'{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Позиция (pub_date, id) из курсора; NotFound, если он испорчен."""
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pub_date, pk = position.rsplit('|', 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise NotFound('Неверный курсор.')
+    if pub_date is None:
+        raise NotFound('Неверный курсор.')
+    return pub_date, pk
+
+
+class RecipePagination(LimitPageNumberPagination):
+    """Пагинация ленты рецептов.
+
+    Без параметра cursor отдаёт прежний ответ с count/next/previous.
+    С ?cursor= (для первой страницы — пустым) включается keyset-режим
+    по (pub_date, id): страница выбирается условием WHERE по
+    составному индексу вместо OFFSET и без COUNT(*), поэтому глубина
+    прокрутки на стоимость запроса не влияет. Keyset-режим применяется
+    только к порядку по умолчанию; если фильтры задали свою сортировку,
+    используется постраничный режим.
+    """
+
+    cursor_query_param = 'cursor'
+    keyset_ordering = ('-pub_date', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = (
+            self.cursor_query_param in request.query_params
+            and not queryset.query.order_by
+        )
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params[self.cursor_query_param]
+        queryset = queryset.order_by(*self.keyset_ordering)
+        if cursor:
+            pub_date, pk = decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page_results = results[:page_size]
+        return self.page_results
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict((
+            ('next', self.get_next_cursor_link()),
+            ('results', data),
+        )))
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        last = self.page_results[-1]
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param,
+            encode_cursor(last.pub_date, last.pk)
+        )
+
+
+class FeedPagination(RecipePagination):
+    """Курсорная пагинация ленты подписок (см. recipes.feed).
+
+    Страница берётся из закешированной ленты пользователя, рецепты
+    страницы загружаются одним запросом по id.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = True
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        position = decode_cursor(cursor) if cursor else None
+
+        positions = get_feed_page(request.user, position, page_size)
+        self.has_next = len(positions) > page_size
+        positions = positions[:page_size]
+        self.last_position = positions[-1] if positions else None
+        recipes = queryset.in_bulk([pk for _, pk in positions])
+        return [recipes[pk] for _, pk in positions if pk in recipes]
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param,
+            encode_cursor(*self.last_position)
+        )
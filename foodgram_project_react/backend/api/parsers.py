@@ -0,0 +1,144 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+
+from recipes.loaders import WHITESPACE, JSONArrayReader
+
+from .fields import Base64ImageWriter
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class JSONObjectReader(JSONArrayReader):
+    """Разбирает JSON-объект верхнего уровня, читая поток кусками.
+
+    Строковые значения полей из stream_fields не собираются в память,
+    а по частям передаются в Base64ImageWriter.
+    """
+
+    def __init__(self, file, stream_fields, read_size=STREAM_CHUNK_SIZE):
+        super().__init__(file, read_size)
+        self.stream_fields = stream_fields
+
+    def expect(self, char):
+        self.skip(WHITESPACE)
+        if self.peek() != char:
+            raise ParseError(f'JSON parse error - ожидался символ {char}')
+        self.position += 1
+
+    def value(self):
+        while True:
+            decoded = self.decode()
+            if decoded is not None:
+                return decoded[0]
+
+    def stream_string(self, writer):
+        """Передаёт содержимое строки в writer по мере чтения."""
+        self.position += 1
+        while True:
+            end = self.buffer.find('"', self.position)
+            if end == -1:
+                end = len(self.buffer)
+            backslash = self.buffer.find('\\', self.position, end)
+            if backslash != -1:
+                end = backslash
+            writer.write(self.buffer[self.position:end])
+            self.position = end
+            if end < len(self.buffer) and self.buffer[end] == '"':
+                self.position = end + 1
+                return writer.finish()
+            if end + 1 < len(self.buffer):
+                if self.buffer[end + 1] != '/':
+                    raise ParseError('JSON parse error - неверная строка')
+                writer.write('/')
+                self.position = end + 2
+            elif self.eof:
+                raise ParseError('JSON parse error - строка не закрыта')
+            else:
+                self.read_more()
+
+    def parse(self):
+        """Объект по грамматике JSON: ключи — строки, между членами ровно
+        одна запятая, после закрывающей скобки только пробельные символы.
+        """
+        data = {}
+        self.expect('{')
+        self.skip(WHITESPACE)
+        if self.peek() == '}':
+            self.position += 1
+        else:
+            while True:
+                self.member(data)
+                self.skip(WHITESPACE)
+                char = self.peek()
+                if char == '}':
+                    self.position += 1
+                    break
+                if char != ',':
+                    raise ParseError(
+                        'JSON parse error - ожидался символ , или }')
+                self.position += 1
+        self.skip(WHITESPACE)
+        if self.peek():
+            raise ParseError('JSON parse error - данные после объекта')
+        return data
+
+    def member(self, data):
+        self.skip(WHITESPACE)
+        if not self.peek():
+            raise ParseError('JSON parse error - объект не закрыт')
+        if self.peek() != '"':
+            raise ParseError('JSON parse error - ключ должен быть строкой')
+        key = self.value()
+        self.expect(':')
+        self.skip(WHITESPACE)
+        if key in self.stream_fields and self.peek() == '"':
+            try:
+                data[key] = self.stream_string(Base64ImageWriter())
+            except ValidationError as error:
+                raise ValidationError({key: error.detail})
+        else:
+            data[key] = self.value()
+
+
+class RecipeJSONParser(JSONParser):
+    """JSON-парсер, декодирующий изображение прямо из потока.
+
+    Обычный JSONParser держит в памяти всё тело запроса, разобранную
+    строку base64 и декодированный файл. Здесь тело читается кусками,
+    а изображение сразу декодируется во временный файл с проверкой
+    лимитов RECIPE_IMAGE_MAX_BYTES и RECIPE_IMAGE_MAX_DIMENSIONS.
+    """
+
+    stream_fields = ('image',)
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return {}
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        reader = JSONObjectReader(
+            TextStream(stream, encoding), self.stream_fields)
+        try:
+            return reader.parse()
+        except ValueError as error:
+            raise ParseError(f'JSON parse error - {error}')
+
+
+class TextStream:
+    """Декодирует байтовый поток запроса в текст по кускам."""
+
+    def __init__(self, stream, encoding):
+        self.stream = stream
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+
+    def read(self, size):
+        # Пустая строка означает конец потока, а кусок может оборваться
+        # посреди многобайтового символа.
+        while True:
+            chunk = self.stream.read(size)
+            text = self.decoder.decode(chunk, final=not chunk)
+            if text or not chunk:
+                return text
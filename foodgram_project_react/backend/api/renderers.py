@@ -0,0 +1,129 @@
+import csv
+import io
+import os
+from abc import ABCMeta, abstractmethod
+from functools import lru_cache
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.renderers import BaseRenderer
+
+TITLE = 'Список покупок с сайта Foodgram:'
+CHUNK_SIZE = 64 * 1024
+
+
+class ShoppingListRenderer(BaseRenderer, metaclass=ABCMeta):
+    """Базовый рендерер списка покупок.
+
+    Строки списка — словари с ключами name, measurement_unit и amount.
+    Метод stream отдаёт файл частями для StreamingHttpResponse.
+    """
+
+    charset = 'utf-8'
+
+    @abstractmethod
+    def stream(self, rows):
+        """Части файла: str или bytes при charset = None."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Ошибки (401, 404 и т.п.) отдаются простым текстом.
+            return '\n'.join(str(value) for value in data.values()).encode()
+        content = self.stream(data)
+        if self.charset is None:
+            return b''.join(content)
+        return ''.join(content).encode(self.charset)
+
+    @staticmethod
+    def format_row(row):
+        return f'{row["name"]}, {row["amount"]} {row["measurement_unit"]}'
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        yield f'{TITLE}\n\n'
+        for row in rows:
+            yield f'{self.format_row(row)}\n'
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('Ингредиент', 'Количество', 'Единица измерения')
+        )
+        for row in rows:
+            yield writer.writerow(
+                (row['name'], row['amount'], row['measurement_unit'])
+            )
+
+
+@lru_cache(maxsize=None)
+def get_pdf_font():
+    """Шрифт с кириллицей из SHOPPING_LIST_PDF_FONT, иначе Helvetica."""
+    path = getattr(settings, 'SHOPPING_LIST_PDF_FONT', None)
+    if not path or not os.path.exists(path):
+        return 'Helvetica'
+    pdfmetrics.registerFont(TTFont('ShoppingListFont', path))
+    return 'ShoppingListFont'
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    """PDF-список покупок.
+
+    reportlab собирает документ целиком при save(), поэтому здесь в
+    памяти держится только готовый файл, а отдаётся он частями.
+    """
+
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    margin = 50
+    line_height = 16
+
+    def stream(self, rows):
+        buffer = io.BytesIO()
+        font = get_pdf_font()
+        width, height = A4
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        pdf.setTitle('Foodgram')
+
+        pdf.setFont(font, 14)
+        top = height - self.margin
+        pdf.drawString(self.margin, top, TITLE)
+        y = top - 2 * self.line_height
+        pdf.setFont(font, 11)
+        for row in rows:
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(font, 11)
+                y = top
+            pdf.drawString(self.margin, y, self.format_row(row))
+            y -= self.line_height
+        pdf.save()
+
+        buffer.seek(0)
+        yield from iter(lambda: buffer.read(CHUNK_SIZE), b'')
+
+
+SHOPPING_LIST_RENDERERS = (
+    ShoppingListTextRenderer,
+    ShoppingListCSVRenderer,
+    ShoppingListPDFRenderer,
+)
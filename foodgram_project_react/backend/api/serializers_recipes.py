@@ -1,11 +1,12 @@
 from django.core.validators import MinValueValidator
 from rest_framework import serializers
-from recipes.models import (Recipe, Tag, Ingredient, IngredientInRecipe,
-                            Favorite, ShoppingCart)
-from django.shortcuts import get_object_or_404
+from recipes.models import Recipe, Tag, Ingredient, IngredientInRecipe
+from recipes.signals import recipe_ingredients_changed
+from recipes.user_state import get_recipe_state
+from django.db import transaction
 from django.core import exceptions
-from drf_extra_fields.fields import Base64ImageField
 from django.contrib.auth import get_user_model
+from .fields import Base64ImageField, RecipeImageField
 from .serializers_users import UserSerializer
 
 User = get_user_model()
@@ -65,30 +66,38 @@ class RecipesViewSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart'
     )
+    image_thumbnail = RecipeImageField('image_thumbnail')
+    image_medium = RecipeImageField('image_medium')
 
     def get_ingredients(self, obj):
-        ingredients = (IngredientInRecipe.objects
-                       .select_related('ingredient').filter(recipe=obj))
+        ingredients = obj.recipes.all()
         serializer = RecipeIngredientReadSerializer(ingredients, many=True)
         return serializer.data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return Favorite.objects.filter(user=user, recipe=obj).exists()
+        return obj.id in get_recipe_state(user).favorites
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(user=user, recipe=obj).exists()
+        return obj.id in get_recipe_state(user).shopping_cart
 
     class Meta:
-        fields = '__all__'
+        exclude = ('search_vector',)
         model = Recipe
 
 
+class RecipeMatchSerializer(RecipesViewSerializer):
+    """Рецепт с долей имеющихся ингредиентов (см. recipes.matching)."""
+
+    coverage = serializers.FloatField(read_only=True)
+    available_count = serializers.IntegerField(read_only=True)
+
+
 class IngredientViewSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -120,14 +129,60 @@ class RecipesModifySerializer(serializers.ModelSerializer):
             )
 
         ingredients = [item['id'] for item in value]
-        for ingredient in ingredients:
-            if ingredients.count(ingredient) > 1:
-                raise exceptions.ValidationError(
-                    'Такой ингридиент уже есть.'
-                )
+        if len(set(ingredients)) != len(ingredients):
+            raise exceptions.ValidationError(
+                'Такой ингридиент уже есть.'
+            )
+
+        missing = set(ingredients) - Ingredient.objects.in_bulk(
+            ingredients).keys()
+        if missing:
+            raise exceptions.ValidationError(
+                'Ингредиенты не найдены: {}.'.format(
+                    ', '.join(str(pk) for pk in sorted(missing)))
+            )
 
         return value
 
+    @staticmethod
+    def create_ingredients(recipe, ingredients):
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe,
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount']
+            )
+            for ingredient in ingredients
+        )
+
+    @classmethod
+    def update_ingredients(cls, recipe, ingredients):
+        """Изменяет только отличающиеся строки IngredientInRecipe."""
+        amounts = {item['id']: item['amount'] for item in ingredients}
+        existing = {
+            item.ingredient_id: item
+            for item in IngredientInRecipe.objects.filter(recipe=recipe)
+        }
+
+        removed = existing.keys() - amounts.keys()
+        if removed:
+            IngredientInRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed).delete()
+
+        changed = []
+        for ingredient_id, item in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ('amount',))
+
+        cls.create_ingredients(recipe, (
+            item for item in ingredients if item['id'] not in existing
+        ))
+
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context.get('request').user
         tags = validated_data.pop('tags')
@@ -135,20 +190,12 @@ class RecipesModifySerializer(serializers.ModelSerializer):
 
         recipe = Recipe.objects.create(author=author, **validated_data)
         recipe.tags.set(tags)
-        for ingredient in ingredients:
-            amount = ingredient['amount']
-            ingredient_object = get_object_or_404(
-                                Ingredient, pk=ingredient['id']
-                                )
-
-            IngredientInRecipe.objects.create(
-                recipe=recipe,
-                ingredient=ingredient_object,
-                amount=amount
-            )
+        self.create_ingredients(recipe, ingredients)
+        recipe_ingredients_changed.send(sender=Recipe, recipe=recipe)
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags', None)
         if tags is not None:
@@ -156,29 +203,31 @@ class RecipesModifySerializer(serializers.ModelSerializer):
 
         ingredients = validated_data.pop('ingredients', None)
         if ingredients is not None:
-            instance.ingredients.clear()
-
-            for ingredient in ingredients:
-                amount = ingredient['amount']
-                ingredient_object = get_object_or_404(Ingredient,
-                                                      pk=ingredient['id'])
-
-                IngredientInRecipe.objects.create(
-                    recipe=instance,
-                    ingredient=ingredient_object,
-                    amount=amount
-                )
+            self.update_ingredients(instance, ingredients)
+            recipe_ingredients_changed.send(sender=Recipe, recipe=instance)
 
         return super().update(instance, validated_data)
 
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        finally:
+            # Временный файл изображения уже перенесён в хранилище.
+            image = self.validated_data.get('image')
+            if image is not None:
+                image.close()
+
     def to_representation(self, instance):
         """Вывод данных."""
+        request = self.context.get('request')
+        instance = Recipe.objects.with_related().with_user_flags(
+            request.user).get(pk=instance.pk)
         serializer = RecipesViewSerializer(
             instance,
-            context={'request': self.context.get('request')}
+            context={'request': request}
         )
         return serializer.data
 
     class Meta:
-        fields = '__all__'
+        exclude = ('search_vector',)
         model = Recipe
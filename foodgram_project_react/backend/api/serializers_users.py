@@ -3,6 +3,7 @@ from rest_framework import serializers
 from recipes.models import Recipe
 from users.models import Subscription
 from djoser.serializers import UserCreateSerializer
+from .fields import RecipeImageField
 from django.core import exceptions
 from django.contrib.auth import get_user_model
 from django.core.validators import validate_email
@@ -13,10 +14,11 @@ User = get_user_model()
 
 
 class UserRecipesShortViewSerializer(serializers.ModelSerializer):
+    image_thumbnail = RecipeImageField('image_thumbnail')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumbnail', 'cooking_time')
 
 
 class UserListSerializer(serializers.ModelSerializer):
@@ -37,6 +39,8 @@ class UserListSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         current_user = self.context['request'].user
         return (
             current_user.is_authenticated
@@ -116,23 +120,24 @@ class SubscriptionListSerializer(UserListSerializer):
     )
 
     def get_recipes(self, obj):
-        author_recipes = Recipe.objects.filter(author=obj)
-
-        if 'recipes_limit' in self.context.get('request').GET:
-            recipes_limit = self.context.get('request').GET['recipes_limit']
-            author_recipes = author_recipes[:int(recipes_limit)]
-
-        if author_recipes:
-            serializer = UserRecipesShortViewSerializer(
-                author_recipes,
-                context={'request': self.context.get('request')},
-                many=True
-            )
-            return serializer.data
-
-        return []
+        # limited_recipes подгружает Prefetch в CustomUserViewSet.
+        author_recipes = getattr(obj, 'limited_recipes', None)
+        if author_recipes is None:
+            author_recipes = Recipe.objects.filter(author=obj)
+            recipes_limit = self.context.get('recipes_limit')
+            if recipes_limit is not None:
+                author_recipes = author_recipes[:recipes_limit]
+
+        serializer = UserRecipesShortViewSerializer(
+            author_recipes,
+            context={'request': self.context.get('request')},
+            many=True
+        )
+        return serializer.data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return Recipe.objects.filter(author=obj).count()
 
     class Meta:
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Ingredient, Tag
+
+from .mixins import bump_reference_version
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def reset_reference_cache(sender, **kwargs):
+    # После коммита: иначе ответ по старым данным закешируют под новой
+    # версией на весь REFERENCE_CACHE_TIMEOUT.
+    transaction.on_commit(lambda: bump_reference_version(sender))
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
+from .async_views import async_read_urls
 from .views import (RecipeViewSet, TagViewSet,
                     IngredientViewSet, CustomUserViewSet)
 
@@ -10,7 +12,12 @@ router.register(r'ingredients', IngredientViewSet)
 
 router.register('users', CustomUserViewSet, basename='users')
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_read_urls(
+        router_urls, (RecipeViewSet, TagViewSet, IngredientViewSet))
+
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
-    path('', include(router.urls)),
+    path('', include(router_urls)),
 ]
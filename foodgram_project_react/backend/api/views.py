@@ -1,24 +1,37 @@
 from rest_framework import filters, status, exceptions
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.settings import api_settings
 
-from django.db.models import Sum
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Count, Prefetch, Value
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
 
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
-from django.http import HttpResponse
-from .filters import RecipeFilter
-
+from django.http import StreamingHttpResponse
+from .filters import RecipeFilter, RecipeSearchFilter
+from .mixins import CachedResponseMixin
+from .pagination import (FeedPagination, LimitPageNumberPagination,
+                         RecipePagination)
+from .parsers import RecipeJSONParser
+from .renderers import SHOPPING_LIST_RENDERERS
+
+from foodgram_api.timing import TimingMixin
 from recipes.models import (Recipe, Tag, Ingredient, ShoppingCart,
-                            Favorite, IngredientInRecipe)
+                            Favorite)
+from recipes.ingredient_index import ingredient_index, search_fuzzy
+from recipes.matching import match_index
+from recipes.shopping_list import get_shopping_list
 from users.models import Subscription
 from .serializers_recipes import (RecipesViewSerializer,
+                                  RecipeMatchSerializer,
                                   RecipesModifySerializer,
                                   IngredientViewSerializer, TagSerializer)
 
@@ -31,41 +44,107 @@ from .serializers_users import (SubscriptionListSerializer,
 User = get_user_model()
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(TimingMixin, ModelViewSet):
     """Вьюсет для операций с рецептом."""
 
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (RecipeSearchFilter, DjangoFilterBackend)
     filterset_class = RecipeFilter
-    search_fields = ('name',)
-    pagination_class = PageNumberPagination
+    pagination_class = RecipePagination
+    parser_classes = (RecipeJSONParser, FormParser, MultiPartParser)
     permission_classes = (IsAuthenticatedOrReadOnly,)
 
     def get_queryset(self):
-        if self.action in ('list', 'retrieve'):
-            return Recipe.objects.prefetch_related(
-                'tags', 'author').all()
+        if self.action in ('list', 'retrieve', 'feed', 'match'):
+            return Recipe.objects.with_related().with_user_flags(
+                self.request.user)
         return Recipe.objects.all()
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action == 'match':
+            return RecipeMatchSerializer
+        if self.action in ('list', 'retrieve', 'feed'):
             return RecipesViewSerializer
         return RecipesModifySerializer
 
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedPagination
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок, новые первыми, по курсору."""
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=('get',),
+        pagination_class=LimitPageNumberPagination
+    )
+    def match(self, request):
+        """Рецепты по ?ingredients=1,2,3, лучшее покрытие первым.
+
+        Индекс отдаёт упорядоченные id, фильтры (теги, автор, поиск)
+        применяются к ним одним запросом, рецепты читаются только для
+        текущей страницы.
+        """
+        matches = match_index.match(self.get_ingredient_ids(),
+                                    settings.RECIPE_MATCH_LIMIT)
+        allowed = set(
+            self.filter_queryset(Recipe.objects.all())
+            .filter(pk__in=[recipe_id for recipe_id, *_ in matches])
+            .values_list('pk', flat=True)
+        )
+        matches = [match for match in matches if match[0] in allowed]
+        page = self.paginate_queryset(matches)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, *_ in page])
+        results = []
+        for recipe_id, coverage, available_count in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                # Рецепт удалён после выборки из индекса.
+                continue
+            recipe.coverage = round(coverage, 4)
+            recipe.available_count = available_count
+            results.append(recipe)
+        serializer = self.get_serializer(results, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def get_ingredient_ids(self):
+        values = [
+            value
+            for param in self.request.query_params.getlist('ingredients')
+            for value in param.split(',') if value.strip()
+        ]
+        try:
+            ingredient_ids = [int(value) for value in values]
+        except ValueError:
+            raise exceptions.ValidationError(
+                {'ingredients': 'Укажите id ингредиентов через запятую.'})
+        if not ingredient_ids:
+            raise exceptions.ValidationError(
+                {'ingredients': 'Укажите хотя бы один ингредиент.'})
+        return ingredient_ids
+
     @action(detail=True, methods=('post', 'delete'))
     def favorite(self, request, pk=None):
         user = self.request.user
         recipe = get_object_or_404(Recipe, pk=pk)
 
-        fav_record = Favorite.objects.filter(
-            user=user,
-            recipe=recipe
-        )
-
         if self.request.method == 'POST':
-            if fav_record.exists():
+            # Проверка по БД: кеш get_recipe_state может отставать и
+            # нужен только для флагов в ответах.
+            with transaction.atomic():
+                _, created = Favorite.objects.get_or_create(
+                    user=user, recipe=recipe)
+                if created:
+                    Recipe.objects.change_counter(
+                        recipe.id, 'favorites_count', 1)
+            if not created:
                 raise exceptions.ValidationError('Рецепт уже в избранном.')
-
-            Favorite.objects.create(user=user, recipe=recipe)
             serializer = UserRecipesShortViewSerializer(
                 recipe,
                 context={'request': request}
@@ -74,13 +153,19 @@ class RecipeViewSet(ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if self.request.method == 'DELETE':
-            if not fav_record.exists():
+            with transaction.atomic():
+                deleted, _ = Favorite.objects.filter(
+                    user=user,
+                    recipe=recipe
+                ).delete()
+                if deleted:
+                    Recipe.objects.change_counter(
+                        recipe.id, 'favorites_count', -deleted)
+            if not deleted:
                 raise exceptions.ValidationError(
                     'Рецепта нет в избранном, либо он уже удален.'
                 )
 
-            fav_record.first().delete()
-
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -89,17 +174,17 @@ class RecipeViewSet(ModelViewSet):
     def shopping_cart(self, request, pk=None):
         user = self.request.user
         recipe = get_object_or_404(Recipe, pk=pk)
-        cart_item = ShoppingCart.objects.filter(
-            user=user,
-            recipe=recipe
-        )
         if self.request.method == 'POST':
-            if cart_item.exists():
+            with transaction.atomic():
+                _, created = ShoppingCart.objects.get_or_create(
+                    user=user, recipe=recipe)
+                if created:
+                    Recipe.objects.change_counter(
+                        recipe.id, 'in_carts_count', 1)
+            if not created:
                 raise exceptions.ValidationError(
                     'Рецепт уже в списке покупок.'
                 )
-
-            ShoppingCart.objects.create(user=user, recipe=recipe)
             serializer = UserRecipesShortViewSerializer(
                 recipe,
                 context={'request': request}
@@ -108,11 +193,18 @@ class RecipeViewSet(ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if self.request.method == 'DELETE':
-            if not cart_item.exists():
+            with transaction.atomic():
+                deleted, _ = ShoppingCart.objects.filter(
+                    user=user,
+                    recipe=recipe
+                ).delete()
+                if deleted:
+                    Recipe.objects.change_counter(
+                        recipe.id, 'in_carts_count', -deleted)
+            if not deleted:
                 raise exceptions.ValidationError(
                     'Рецепта нет в списке покупок, либо он уже удален.'
                 )
-            cart_item.delete()
 
             return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -121,34 +213,27 @@ class RecipeViewSet(ModelViewSet):
     @action(
         detail=False,
         methods=('get',),
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=SHOPPING_LIST_RENDERERS
     )
     def download_shopping_cart(self, request):
-        buy_list = IngredientInRecipe.objects.filter(
-            recipe__shopping_card_recipes__user=request.user
-        ).values(
-            'ingredient'
-        ).annotate(
-            amount=Sum('amount')
+        """Список покупок в формате из ?format= (txt, csv или pdf).
+
+        Единицы приводятся и совместимые строки объединяются, готовый
+        список берётся из кеша (см. recipes.shopping_list).
+        """
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(get_shopping_list(request.user)),
+            content_type=renderer.media_type
         )
-
-        buy_list_text = 'Список покупок с сайта Foodgram:\n\n'
-        for item in buy_list:
-            ingredient = Ingredient.objects.get(pk=item['ingredient'])
-            amount = item['amount']
-            buy_list_text += (
-                f'{ingredient.name}, {amount} '
-                f'{ingredient.measurement_unit}\n'
-            )
-
-        response = HttpResponse(buy_list_text, content_type="text/plain")
         response['Content-Disposition'] = (
-            'attachment; filename=shopping-list.txt'
+            f'attachment; filename=shopping-list.{renderer.format}'
         )
         return response
 
 
-class TagViewSet(ModelViewSet):
+class TagViewSet(TimingMixin, CachedResponseMixin, ModelViewSet):
     """Вьюсет для тегов."""
 
     queryset = Tag.objects.all().order_by('id')
@@ -157,25 +242,48 @@ class TagViewSet(ModelViewSet):
     pagination_class = None
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
-    """Вьюсет для ингредиентов."""
+class IngredientViewSet(TimingMixin, CachedResponseMixin,
+                        ReadOnlyModelViewSet):
+    """Вьюсет для ингредиентов.
+
+    Поиск по ?name= (префикс названия) обслуживается индексом в памяти,
+    ?fuzzy=1 включает нечёткий поиск.
+    """
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientViewSerializer
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('^name',)
     pagination_class = None
     permission_classes = (IsAuthenticatedOrReadOnly,)
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(api_settings.SEARCH_PARAM)
+        if not name:
+            return super().list(request, *args, **kwargs)
+
+        limit = self.get_search_limit()
+        if request.query_params.get('fuzzy') == '1':
+            return Response(search_fuzzy(name, limit))
+        return Response(ingredient_index.search(name, limit))
+
+    def get_search_limit(self):
+        limit = self.request.query_params.get(
+            'limit', settings.INGREDIENT_SEARCH_LIMIT)
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise exceptions.ValidationError(
+                {'limit': 'Укажите целое число.'})
+        return max(1, min(limit, settings.INGREDIENT_SEARCH_LIMIT))
 
-class CustomUserViewSet(UserViewSet):
+
+class CustomUserViewSet(TimingMixin, UserViewSet):
     """Кастомный вьюсет для пользователей на основе djoser-вьюсета."""
 
     queryset = User.objects.all()
     lookup_field = 'id'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
-    pagination_class = PageNumberPagination
+    pagination_class = LimitPageNumberPagination
     permission_classes = (IsAuthenticatedOrReadOnly,)
     serializer_class = UserListSerializer
 
@@ -219,13 +327,40 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated, ),
     )
     def subscriptions(self, request):
+        recipes = Recipe.objects.order_by('-pub_date', '-id')
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes.newest_per_author(recipes_limit)
+
         queryset = User.objects.filter(
-            author__in=self.request.user.subscriber.all())
+            author__user=request.user
+        ).annotate(
+            recipes_count=Count('recipe', distinct=True),
+            is_subscribed=Value(True, BooleanField())
+        ).prefetch_related(
+            Prefetch('recipe_set', queryset=recipes,
+                     to_attr='limited_recipes')
+        ).order_by('id')
         paginated_queryset = self.paginate_queryset(queryset)
         serializer = self.get_serializer(paginated_queryset, many=True)
 
         return self.get_paginated_response(serializer.data)
 
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit is None:
+            return None
+        if not recipes_limit.isdecimal():
+            raise exceptions.ValidationError(
+                {'recipes_limit': 'Укажите неотрицательное целое число.'})
+        return int(recipes_limit)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('subscriptions', 'subscribe'):
+            context['recipes_limit'] = self.get_recipes_limit()
+        return context
+
     @action(
         detail=True,
         methods=('post', 'delete',),
@@ -4,7 +4,11 @@ ASGI config for Foodgram project.
 It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+
+Запуск: gunicorn foodgram_api.asgi:application
+-k uvicorn.workers.UvicornWorker. Чтение рецептов, тегов и ингредиентов
+при этом выполняется асинхронными представлениями (api.async_views).
 """
 
 import os
@@ -12,5 +16,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_api.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -1,5 +1,7 @@
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -23,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'djoser',
     'rest_framework.authtoken',
@@ -34,6 +37,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'foodgram_api.timing.TimingMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -64,6 +68,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram_api.wsgi.application'
+ASGI_APPLICATION = 'foodgram_api.asgi.application'
+
+# ASGI-режим (включается в asgi.py): GET рецептов, тегов и ингредиентов
+# выполняются в пуле потоков api.async_views; размер пула ограничивает и
+# число соединений с БД на процесс.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', default='False') == 'True'
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', default=16))
 
 DATABASES = {
     'default': {
@@ -78,6 +89,56 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    },
+    # Ответы справочников (теги, ингредиенты).
+    'reference': {
+        'BACKEND': os.getenv(
+            'REFERENCE_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv(
+            'REFERENCE_CACHE_LOCATION', default='foodgram-reference'
+        ),
+    },
+}
+
+# Число воркеров gunicorn (он сам читает WEB_CONCURRENCY). Версии
+# индексов, ленты и справочников хранятся в кеше без срока жизни, и
+# воркеры узнают о сбросе только через общий кеш, поэтому LocMemCache
+# допустим лишь при одном воркере.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', default=1))
+if WEB_CONCURRENCY > 1 and any(
+        cache['BACKEND'].endswith('LocMemCache')
+        for cache in CACHES.values()):
+    raise ImproperlyConfigured(
+        'При WEB_CONCURRENCY > 1 задайте общий кеш в CACHE_BACKEND и '
+        'REFERENCE_CACHE_BACKEND (например, Memcached).')
+
+REFERENCE_CACHE_ALIAS = 'reference'
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+
+RECIPE_STATE_CACHE_TIMEOUT = 60 * 60
+
+# Сколько хранить готовый список покупок пользователя.
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Лента подписок: сколько последних рецептов автора держать в кеше,
+# длина закешированной ленты пользователя и время жизни записей.
+RECIPE_FEED_AUTHOR_DEPTH = 50
+RECIPE_FEED_TIMELINE_SIZE = 500
+RECIPE_FEED_CACHE_TIMEOUT = 60 * 60
+
+# Максимум подсказок в автодополнении ингредиентов.
+INGREDIENT_SEARCH_LIMIT = 50
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': ('django.contrib.auth.password_validation'
@@ -144,4 +205,43 @@ DJOSER = {
 
 AUTH_USER_MODEL = 'users.User'
 
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 SYMBOLS_LIMIT = 30
+
+# Шрифт с кириллицей для PDF-списка покупок.
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+# Сколько последних замеров запросов хранить для debug/timings/.
+REQUEST_TIMING_BUFFER = 1000
+# Подключить debug/timings/ независимо от DEBUG.
+REQUEST_TIMING_ENDPOINT = os.getenv('REQUEST_TIMING_ENDPOINT',
+                                    default='False') == 'True'
+
+# Копии изображений рецептов: размеры, формат (WEBP или JPEG) и число
+# фоновых потоков; 0 — строить сразу после коммита в том же потоке.
+RECIPE_THUMBNAIL_SIZE = (300, 300)
+RECIPE_MEDIUM_SIZE = (800, 800)
+RECIPE_IMAGE_FORMAT = os.getenv('RECIPE_IMAGE_FORMAT', default='WEBP')
+RECIPE_IMAGE_QUALITY = 80
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', default=2))
+
+# Лимиты загружаемого изображения рецепта: проверяются при потоковом
+# декодировании base64, до того как файл будет прочитан целиком.
+RECIPE_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_DIMENSIONS = (6000, 6000)
+
+# Полнотекстовый поиск рецептов: конфигурация PostgreSQL и сколько лучших
+# совпадений отдаёт индекс в памяти на других СУБД.
+RECIPE_SEARCH_CONFIG = 'russian'
+RECIPE_SEARCH_LIMIT = 1000
+
+# Подбор рецептов по ингредиентам: сколько лучших совпадений отдавать,
+# после скольких изменений перестраивать индекс целиком и сколько
+# хранить записи журнала изменений.
+RECIPE_MATCH_LIMIT = 1000
+RECIPE_MATCH_MAX_CHANGES = 1000
+RECIPE_MATCH_CHANGE_TIMEOUT = 24 * 60 * 60
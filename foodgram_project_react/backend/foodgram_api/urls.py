@@ -3,12 +3,17 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .timing import timing_stats
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
 ]
 
 
+if settings.REQUEST_TIMING_ENDPOINT:
+    urlpatterns += [path('debug/timings/', timing_stats)]
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL,
                           document_root=settings.MEDIA_ROOT)
@@ -3,6 +3,8 @@ from django.utils.html import format_html
 
 from .models import (Recipe, Tag, Ingredient, IngredientInRecipe,
                      TagInRecipe, Favorite, ShoppingCart)
+from .search import search_recipes
+from .signals import recipe_ingredients_changed
 
 
 class TagInRecipeAdmin(admin.TabularInline):
@@ -31,13 +33,16 @@ class TagAdmin(admin.ModelAdmin):
 class RecipeAdmin(admin.ModelAdmin):
 
     def image_tag(self, obj):
-        return format_html(
-            '<img src="{}" height="100"/>'.format(obj.image.url))
+        image = obj.image_thumbnail or obj.image
+        if not image:
+            return None
+        return format_html('<img src="{}" height="100"/>', image.url)
 
     image_tag.short_description = 'Image'
 
     list_display = ('id', 'name', 'text', 'cooking_time', 'image',
-                    'get_tags', 'pub_date', 'image_tag')
+                    'get_tags', 'pub_date', 'favorites_count',
+                    'in_carts_count', 'image_tag')
 
     list_display_links = ('id', 'name')
 
@@ -45,7 +50,7 @@ class RecipeAdmin(admin.ModelAdmin):
                      'ingredients__name')
     list_filter = ('pub_date', 'tags',)
 
-    readonly_fields = ['image_tag']
+    readonly_fields = ['image_tag', 'favorites_count', 'in_carts_count']
 
     inlines = (IngredientInRecipeAdmin, TagInRecipeAdmin)
     empty_value_display = '-пусто-'
@@ -53,6 +58,15 @@ class RecipeAdmin(admin.ModelAdmin):
     def get_tags(self, obj):
         return ', '.join([i.name for i in obj.tags.all()])
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search_recipes(queryset, search_term), False
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        recipe_ingredients_changed.send(sender=Recipe, recipe=form.instance)
+
 
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('id', 'recipe', 'user',)
@@ -0,0 +1,144 @@
+"""Лента рецептов авторов, на которых подписан пользователь.
+
+Для каждого автора в кеше лежит список позиций (pub_date, id) его
+последних RECIPE_FEED_AUTHOR_DEPTH рецептов и версия этого списка.
+Лента пользователя — слияние списков его авторов через heapq.merge; она
+кешируется вместе с подписью из id авторов и их версий и пересобирается,
+только когда подпись изменилась: автор опубликовал или удалил рецепт,
+пользователь подписался или отписался.
+"""
+import hashlib
+import heapq
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from users.models import Subscription
+
+from .models import Recipe
+
+
+def author_recipes_key(author_id):
+    return f'recipes:feed:author:{author_id}'
+
+
+def author_version_key(author_id):
+    return f'recipes:feed:author_version:{author_id}'
+
+
+def timeline_key(user_id):
+    return f'recipes:feed:timeline:{user_id}'
+
+
+def get_author_versions(author_ids):
+    """Версии списков авторов; пропавшие из кеша получают новую версию."""
+    keys = [author_version_key(author_id) for author_id in author_ids]
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def get_author_recipes(author_ids):
+    """Последние позиции (pub_date, id) каждого автора, новые первыми."""
+    keys = {author_recipes_key(author_id): author_id
+            for author_id in author_ids}
+    cached = cache.get_many(keys)
+    lists = {keys[key]: positions for key, positions in cached.items()}
+    missing = [author_id for author_id in author_ids
+               if author_id not in lists]
+    if missing:
+        for author_id in missing:
+            lists[author_id] = []
+        rows = (
+            Recipe.objects.filter(author__in=missing)
+            .newest_per_author(settings.RECIPE_FEED_AUTHOR_DEPTH)
+            .order_by('-pub_date', '-id')
+            .values_list('author_id', 'pub_date', 'id')
+        )
+        for author_id, pub_date, pk in rows:
+            lists[author_id].append((pub_date, pk))
+        cache.set_many(
+            {author_recipes_key(author_id): lists[author_id]
+             for author_id in missing},
+            settings.RECIPE_FEED_CACHE_TIMEOUT
+        )
+    return lists
+
+
+def build_timeline(author_ids):
+    """Слияние списков авторов и признак того, что лента в нём целиком.
+
+    У автора, чей список заполнен до RECIPE_FEED_AUTHOR_DEPTH, могут
+    быть и более старые рецепты, поэтому слияние верно только до самой
+    свежей из последних позиций таких списков.
+    """
+    lists = get_author_recipes(author_ids).values()
+    depth = settings.RECIPE_FEED_AUTHOR_DEPTH
+    boundary = max(
+        (positions[-1] for positions in lists if len(positions) >= depth),
+        default=None
+    )
+    size = settings.RECIPE_FEED_TIMELINE_SIZE
+    timeline = []
+    for position in heapq.merge(*lists, reverse=True):
+        if len(timeline) >= size or (
+                boundary is not None and position < boundary):
+            return timeline, False
+        timeline.append(position)
+    return timeline, boundary is None
+
+
+def get_timeline(user_id, author_ids):
+    versions = get_author_versions(author_ids)
+    signature = hashlib.sha1(
+        f'{author_ids}|{versions}'.encode()).hexdigest()
+    key = timeline_key(user_id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1], cached[2]
+    timeline, complete = build_timeline(author_ids)
+    cache.set(key, (signature, timeline, complete),
+              settings.RECIPE_FEED_CACHE_TIMEOUT)
+    return timeline, complete
+
+
+def get_feed_page(user, position, limit):
+    """До limit + 1 позиций ленты после position (None — с начала).
+
+    Всё, что дальше закешированной ленты, читается из БД keyset-запросом.
+    """
+    author_ids = sorted(
+        Subscription.objects.filter(user=user)
+        .values_list('author_id', flat=True)
+    )
+    if not author_ids:
+        return []
+    timeline, complete = get_timeline(user.pk, author_ids)
+    start = 0
+    if position is not None:
+        start = next((index for index, item in enumerate(timeline)
+                      if item < position), len(timeline))
+    page = timeline[start:start + limit + 1]
+    if len(page) > limit or complete:
+        return page
+
+    last = page[-1] if page else position
+    queryset = Recipe.objects.filter(author__in=author_ids)
+    if last is not None:
+        pub_date, pk = last
+        queryset = queryset.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+    return page + list(
+        queryset.order_by('-pub_date', '-id')
+        .values_list('pub_date', 'id')[:limit + 1 - len(page)]
+    )
+
+
+def invalidate_author_feed(author_id):
+    cache.delete(author_recipes_key(author_id))
+    cache.set(author_version_key(author_id), uuid4().hex, None)
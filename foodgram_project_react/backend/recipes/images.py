@@ -0,0 +1,129 @@
+"""Уменьшенные копии изображений рецептов.
+
+После сохранения рецепта с новым изображением миниатюра и копия
+среднего размера строятся в фоновом пуле потоков, чтобы работа Pillow
+не попадала во время ответа. При RECIPE_IMAGE_WORKERS = 0 копии
+строятся сразу после коммита в том же потоке.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_renditions():
+    """Поле модели -> (размер, обрезать ли до точного размера)."""
+    return {
+        'image_thumbnail': (settings.RECIPE_THUMBNAIL_SIZE, True),
+        'image_medium': (settings.RECIPE_MEDIUM_SIZE, False),
+    }
+
+
+def rendition_name(image_name, field_name):
+    """Имя файла копии, однозначно выводимое из имени оригинала."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    suffix = field_name.replace('image_', '')
+    extension = EXTENSIONS[settings.RECIPE_IMAGE_FORMAT]
+    return f'recipe/images/renditions/{stem}_{suffix}.{extension}'
+
+
+def needs_renditions(recipe):
+    if not recipe.image:
+        return False
+    return any(
+        getattr(recipe, field_name).name != rendition_name(
+            recipe.image.name, field_name)
+        for field_name in get_renditions()
+    )
+
+
+def render(source, size, crop):
+    """Копия изображения в RECIPE_IMAGE_FORMAT."""
+    image = ImageOps.exif_transpose(source)
+    if crop:
+        image = ImageOps.fit(image, size, Image.LANCZOS)
+    else:
+        image = image.copy()
+        image.thumbnail(size, Image.LANCZOS)
+    image_format = settings.RECIPE_IMAGE_FORMAT
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, quality=settings.RECIPE_IMAGE_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_renditions(recipe_id, image_name):
+    """Строит копии и записывает их в рецепт без сигналов."""
+    from .models import Recipe
+
+    try:
+        storage = Recipe._meta.get_field('image').storage
+        with storage.open(image_name) as file, Image.open(file) as source:
+            source.load()
+            names = {}
+            for field_name, (size, crop) in get_renditions().items():
+                name = rendition_name(image_name, field_name)
+                if storage.exists(name):
+                    storage.delete(name)
+                names[field_name] = storage.save(
+                    name, render(source, size, crop))
+        with transaction.atomic():
+            previous = Recipe.objects.select_for_update().filter(
+                pk=recipe_id, image=image_name).values(*names).first()
+            if previous is not None:
+                Recipe.objects.filter(pk=recipe_id).update(**names)
+        # Пока строились копии, изображение могли заменить: тогда
+        # удаляются новые копии, иначе — копии прежнего изображения.
+        stale = (names.values() if previous is None
+                 else set(previous.values()) - set(names.values()))
+        for name in stale:
+            if name:
+                storage.delete(name)
+    except Exception:
+        logger.exception('Не удалось построить копии изображения %s',
+                         image_name)
+
+
+def generate_in_worker(recipe_id, image_name):
+    try:
+        generate_renditions(recipe_id, image_name)
+    finally:
+        # У каждого потока пула своё соединение с БД.
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-images')
+        return _executor
+
+
+def schedule_renditions(recipe):
+    """Ставит построение копий в очередь после коммита транзакции."""
+    recipe_id, image_name = recipe.pk, recipe.image.name
+
+    def submit():
+        if settings.RECIPE_IMAGE_WORKERS:
+            get_executor().submit(generate_in_worker, recipe_id, image_name)
+        else:
+            generate_renditions(recipe_id, image_name)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,93 @@
+import difflib
+import threading
+from bisect import bisect_left
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import Ingredient
+
+VERSION_KEY = 'recipes:ingredient_index:version'
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Названия хранятся отсортированными в нижнем регистре, поиск по
+    префиксу — бинарный поиск и срез. Индекс строится при первом
+    обращении и перестраивается, когда меняется версия в кеше
+    (её сбрасывают сигналы сохранения и удаления Ingredient).
+    """
+
+    def __init__(self):
+        self._data = ([], [])
+        self._version = object()
+        self._lock = threading.Lock()
+
+    def search(self, prefix, limit):
+        keys, rows = self._snapshot()
+        prefix = prefix.lower()
+        result = []
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            if len(result) >= limit or not keys[position].startswith(prefix):
+                break
+            result.append(rows[position])
+        return result
+
+    def fuzzy(self, term, limit, cutoff=0.6):
+        """Нечёткий поиск без pg_trgm: difflib по названиям."""
+        keys, rows = self._snapshot()
+        positions = {}
+        for position, key in enumerate(keys):
+            positions.setdefault(key, position)
+        matches = difflib.get_close_matches(
+            term.lower(), positions.keys(), n=limit, cutoff=cutoff)
+        return [rows[positions[key]] for key in matches]
+
+    def _snapshot(self):
+        version = get_version()
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self._build(version)
+        return self._data
+
+    def _build(self, version):
+        ingredients = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda row: (row['name'].lower(), row['id'])
+        )
+        keys = [row['name'].lower() for row in ingredients]
+        self._data = (keys, ingredients)
+        self._version = version
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_ingredient_index():
+    cache.set(VERSION_KEY, uuid4().hex, None)
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_fuzzy(term, limit):
+    """Нечёткий поиск: pg_trgm на PostgreSQL, иначе индекс в памяти."""
+    if connection.vendor != 'postgresql':
+        return ingredient_index.fuzzy(term, limit)
+
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    return list(
+        Ingredient.objects.filter(name__trigram_similar=term)
+        .annotate(similarity=TrigramSimilarity('name', term))
+        .order_by('-similarity', 'name')
+        .values('id', 'name', 'measurement_unit')[:limit]
+    )
@@ -0,0 +1,149 @@
+import csv
+import io
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+READ_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+
+
+class JSONArrayReader:
+    """Читает JSON-массив верхнего уровня кусками по read_size.
+
+    В памяти держится только текущий кусок, а не весь документ.
+    """
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, file, read_size=READ_SIZE):
+        self.file = file
+        self.read_size = read_size
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def read_more(self):
+        chunk = self.file.read(self.read_size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def skip(self, chars):
+        while True:
+            while (self.position < len(self.buffer)
+                   and self.buffer[self.position] in chars):
+                self.position += 1
+            if self.position < len(self.buffer) or self.eof:
+                return
+            self.read_more()
+
+    def peek(self):
+        return self.buffer[self.position:self.position + 1]
+
+    def decode(self):
+        """Следующий элемент или None, если кусок нужно дочитать."""
+        try:
+            item, end = self.decoder.raw_decode(self.buffer, self.position)
+        except json.JSONDecodeError:
+            if self.eof:
+                raise
+            self.read_more()
+            return None
+        # Значение, упёршееся в конец куска, могло быть обрезано.
+        if end == len(self.buffer) and not self.eof:
+            self.read_more()
+            return None
+        self.position = end
+        return (item,)
+
+    def __iter__(self):
+        self.skip(WHITESPACE)
+        if self.peek() != '[':
+            raise ValueError('Ожидался JSON-массив.')
+        self.position += 1
+        while True:
+            self.skip(WHITESPACE + ',')
+            if self.peek() == ']':
+                return
+            if not self.peek():
+                raise ValueError('JSON-массив не закрыт.')
+            decoded = self.decode()
+            if decoded is not None:
+                yield decoded[0]
+
+
+def iter_json_array(file, read_size=READ_SIZE):
+    """Элементы JSON-массива верхнего уровня по одному."""
+    return iter(JSONArrayReader(file, read_size))
+
+
+def iter_csv_rows(file, fieldnames):
+    """Строки CSV без заголовка в виде словарей."""
+    return csv.DictReader(file, fieldnames=fieldnames)
+
+
+@contextmanager
+def keep_auto_now(model, attnames=None):
+    """Сохраняет значения auto_now- и auto_now_add-полей из данных.
+
+    Иначе save и bulk_create подставляют в них текущее время. attnames
+    ограничивает набор полей (например, столбцами файла).
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if (getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False))
+        and (attnames is None or field.attname in attnames)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Вставка строк через COPY FROM STDIN (только PostgreSQL)."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            table, ', '.join(columns)),
+        buffer
+    )
+
+
+def sort_models(models):
+    """Модели в порядке зависимостей: сначала те, на кого ссылаются."""
+    models = list(models)
+    ordered = []
+    visiting = set()
+
+    def visit(model):
+        if model in ordered or model in visiting:
+            return
+        visiting.add(model)
+        for field in model._meta.concrete_fields:
+            related = field.related_model
+            if field.is_relation and related in models:
+                visit(related)
+        visiting.discard(model)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
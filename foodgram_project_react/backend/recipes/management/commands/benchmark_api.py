@@ -0,0 +1,124 @@
+import json
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Tag
+from users.models import User
+
+
+def percentile(values, share):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, int(round(share * len(ordered))) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет основные эндпоинты через тестовый клиент и выводит '
+            'p50/p95 и число запросов к БД в формате JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--user',
+            help='Имя пользователя; по умолчанию самый активный подписчик.'
+        )
+        parser.add_argument('--output', help='Куда сохранить результат.')
+        parser.add_argument(
+            '--baseline', help='Сохранённый результат для сравнения.')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        results = {}
+        for name, path in self.get_endpoints():
+            results[name] = self.measure(client, path, options['iterations'],
+                                         options['warmup'])
+
+        report = json.dumps(results, ensure_ascii=False, indent=2,
+                            sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+        self.stdout.write(report)
+        if options['baseline']:
+            self.compare(results, options['baseline'])
+
+    @staticmethod
+    def get_user(username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {username} не найден.')
+        user = (User.objects.annotate(subscriptions=Count('subscriber'))
+                .order_by('-subscriptions', 'pk').first())
+        if user is None:
+            raise CommandError(
+                'Нет пользователей, запустите generate_load_data.')
+        return user
+
+    @staticmethod
+    def get_endpoints():
+        tag = Tag.objects.values_list('slug', flat=True).first() or 'none'
+        prefix = (Ingredient.objects.values_list('name', flat=True)
+                  .first() or 'а')[:2]
+        return (
+            ('recipes_list', '/api/recipes/'),
+            ('recipes_list_tag', f'/api/recipes/?tags={tag}'),
+            ('recipes_favorited', '/api/recipes/?is_favorited=1'),
+            ('recipes_in_cart', '/api/recipes/?is_in_shopping_cart=1'),
+            ('download_shopping_cart',
+             '/api/recipes/download_shopping_cart/'),
+            ('subscriptions', '/api/users/subscriptions/?recipes_limit=3'),
+            ('ingredient_search', f'/api/ingredients/?name={prefix}'),
+        )
+
+    @staticmethod
+    def measure(client, path, iterations, warmup):
+        for _ in range(warmup):
+            b''.join(client.get(path))
+        timings = []
+        queries = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                started = perf_counter()
+                response = client.get(path)
+                # Потоковые ответы выполняют запросы во время чтения.
+                b''.join(response)
+                timings.append((perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+        return {
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': max(queries),
+        }
+
+    def compare(self, results, path):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        self.stdout.write('\nСравнение с базовым прогоном:')
+        for name, current in sorted(results.items()):
+            before = baseline.get(name)
+            if before is None:
+                self.stdout.write(f'{name}: нет в базовом прогоне')
+                continue
+            change = ((current['p50_ms'] - before['p50_ms'])
+                      / max(before['p50_ms'], 1e-9) * 100)
+            self.stdout.write(
+                f'{name}: p50 {before["p50_ms"]} -> {current["p50_ms"]} мс '
+                f'({change:+.0f}%), p95 {before["p95_ms"]} -> '
+                f'{current["p95_ms"]} мс, запросов {before["queries"]} -> '
+                f'{current["queries"]}'
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_renditions, needs_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие копии изображений для уже созданных рецептов'
+
+    def handle(self, *args, **options):
+        built = 0
+        recipes = Recipe.objects.exclude(image='').exclude(image=None).only(
+            'image', 'image_thumbnail', 'image_medium')
+        for recipe in recipes.iterator():
+            if needs_renditions(recipe):
+                generate_renditions(recipe.pk, recipe.image.name)
+                built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Построены копии для рецептов: {built}'))
@@ -0,0 +1,201 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.mixins import bump_reference_version
+from recipes.ingredient_index import invalidate_ingredient_index
+from recipes.matching import invalidate_match_index
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe,
+                            Recipe, ShoppingCart, Tag, TagInRecipe)
+from recipes.search import update_search_documents
+from users.models import Subscription, User
+
+USERNAME_PREFIX = 'load_'
+PASSWORD = 'load-password'
+TAGS = (
+    ('Завтрак', 'Coral', 'breakfast'),
+    ('Обед', 'Green', 'lunch'),
+    ('Ужин', 'Blue', 'dinner'),
+)
+
+
+class Skewed:
+    """Выбор с распределением Ципфа: первые элементы популярнее."""
+
+    def __init__(self, population, exponent, rng):
+        self.population = list(population)
+        self.rng = rng
+        weights = (1 / (rank + 1) ** exponent
+                   for rank in range(len(self.population)))
+        self.cum_weights = list(accumulate(weights))
+
+    def choices(self, k):
+        return self.rng.choices(self.population, cum_weights=self.cum_weights,
+                                k=k)
+
+    def sample(self, k):
+        """До k разных элементов."""
+        k = min(k, len(self.population))
+        chosen = set()
+        for _ in range(k * 4):
+            chosen.update(self.choices(k - len(chosen)))
+            if len(chosen) >= k:
+                break
+        return chosen
+
+
+class Command(BaseCommand):
+    help = ('Создаёт синтетических пользователей, рецепты, избранное, '
+            'списки покупок и подписки для нагрузочных тестов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа для популярности.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Размер пачки для bulk_create; по умолчанию выбирает СУБД.'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.skew = options['skew']
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            tags = self.get_tags()
+            ingredients = self.get_ingredients(
+                options['ingredients_per_recipe'])
+            recipes = self.create_recipes(options['recipes'], users, tags,
+                                          ingredients,
+                                          options['ingredients_per_recipe'])
+            favorites = self.create_links(
+                Favorite, users, recipes, options['favorites_per_user'])
+            carts = self.create_links(
+                ShoppingCart, users, recipes, options['cart_per_user'])
+            subscriptions = self.create_subscriptions(
+                users, options['subscriptions_per_user'])
+            Recipe.objects.reconcile_counters()
+            update_search_documents()
+        invalidate_ingredient_index()
+        invalidate_match_index()
+        bump_reference_version(Tag)
+        bump_reference_version(Ingredient)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(users)}, рецептов: {len(recipes)}, '
+            f'избранного: {favorites}, в списках покупок: {carts}, '
+            f'подписок: {subscriptions}. Пароль: {PASSWORD}'
+        ))
+
+    def skewed(self, population):
+        population = list(population)
+        self.rng.shuffle(population)
+        return Skewed(population, self.skew, self.rng)
+
+    def create_users(self, count):
+        start = User.objects.filter(
+            username__startswith=USERNAME_PREFIX).count()
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (User(username=f'{USERNAME_PREFIX}{number}',
+                  email=f'{USERNAME_PREFIX}{number}@foodgram.fake',
+                  first_name='Нагрузка', last_name=str(number),
+                  password=password)
+             for number in range(start, start + count)),
+            batch_size=self.batch_size
+        )
+        return list(User.objects.filter(
+            username__startswith=USERNAME_PREFIX).order_by('pk'))
+
+    @staticmethod
+    def get_tags():
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color})
+        return list(Tag.objects.all())
+
+    def get_ingredients(self, per_recipe):
+        ingredients = list(Ingredient.objects.all())
+        missing = per_recipe * 10 - len(ingredients)
+        if missing > 0:
+            Ingredient.objects.bulk_create(
+                Ingredient(name=f'ингредиент {number}',
+                           measurement_unit=self.rng.choice(('г', 'мл')))
+                for number in range(len(ingredients),
+                                    len(ingredients) + missing)
+            )
+            ingredients = list(Ingredient.objects.all())
+        return ingredients
+
+    def create_recipes(self, count, users, tags, ingredients, per_recipe):
+        authors = self.skewed(users)
+        now = timezone.now()
+        recipes = [
+            Recipe(name=f'Рецепт {number}', text='Сгенерировано для теста.',
+                   cooking_time=self.rng.randint(5, 180),
+                   image='recipe/images/load.png', author=author)
+            for number, author in enumerate(authors.choices(count))
+        ]
+        Recipe.objects.bulk_create(recipes, batch_size=self.batch_size)
+        recipes = list(Recipe.objects.filter(
+            author__username__startswith=USERNAME_PREFIX,
+            pub_date__gte=now))
+        # pub_date выставляется auto_now_add, разносим даты на год назад.
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(
+                minutes=self.rng.randint(0, 365 * 24 * 60))
+        Recipe.objects.bulk_update(recipes, ('pub_date',),
+                                   batch_size=self.batch_size)
+
+        popular = self.skewed(ingredients)
+        TagInRecipe.objects.bulk_create(
+            (TagInRecipe(recipe=recipe, tag=tag)
+             for recipe in recipes
+             for tag in self.rng.sample(tags, self.rng.randint(1, len(tags)))),
+            batch_size=self.batch_size
+        )
+        IngredientInRecipe.objects.bulk_create(
+            (IngredientInRecipe(recipe=recipe, ingredient=ingredient,
+                                amount=self.rng.randint(1, 500))
+             for recipe in recipes
+             for ingredient in popular.sample(
+                 max(1, int(self.rng.gauss(per_recipe, per_recipe / 4))))),
+            batch_size=self.batch_size
+        )
+        return recipes
+
+    def create_links(self, model, users, recipes, per_user):
+        popular = self.skewed(recipes)
+        links = [
+            model(user=user, recipe=recipe)
+            for user in users
+            for recipe in popular.sample(self.rng.randint(0, per_user * 2))
+        ]
+        model.objects.bulk_create(links, batch_size=self.batch_size,
+                                  ignore_conflicts=True)
+        return len(links)
+
+    def create_subscriptions(self, users, per_user):
+        popular = self.skewed(users)
+        subscriptions = [
+            Subscription(user=user, author=author)
+            for user in users
+            for author in popular.sample(self.rng.randint(0, per_user * 2))
+            if author != user
+        ]
+        Subscription.objects.bulk_create(
+            subscriptions, batch_size=self.batch_size, ignore_conflicts=True)
+        return len(subscriptions)
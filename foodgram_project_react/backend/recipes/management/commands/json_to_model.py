@@ -1,36 +1,108 @@
-import json
+import os
+from time import perf_counter
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from recipes.models import Ingredient
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
-from django.db import connection
+from api.mixins import bump_reference_version
+from recipes.ingredient_index import invalidate_ingredient_index
+from recipes.loaders import batched, copy_rows, iter_csv_rows, iter_json_array
+from recipes.models import Ingredient
 
 DATA_FOLDER = f"{settings.BASE_DIR}/../data"
-DB_ENGINE = settings.DATABASES.get("default").get("ENGINE")
+FIELDS = ('name', 'measurement_unit')
+
 
 class Command(BaseCommand):
-    help = 'Load csv files to models'
+    help = 'Load ingredients from json or csv file to models'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file', default=f'{DATA_FOLDER}/ingredients.json',
+            help='Файл ингредиентов: .json (массив объектов) или .csv '
+                 '(название,единица измерения без заголовка).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк вставлять за один запрос.'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Не очищать таблицу, а добавить только отсутствующие '
+                 'пары (name, measurement_unit).'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY на PostgreSQL, только bulk_create.'
+        )
 
-        with connection.cursor() as cursor:
-            
-            cursor.execute(f"DELETE FROM {Ingredient._meta.db_table}")
+    def handle(self, *args, **options):
+        path = options['file']
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in ('.json', '.csv'):
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        use_copy = (connection.vendor == 'postgresql'
+                    and not options['no_copy'])
 
-            if DB_ENGINE == "django.db.backends.postgresql":
-                cursor.execute(f"ALTER SEQUENCE {Ingredient._meta.db_table}_id_seq RESTART WITH 1")
+        started = perf_counter()
+        with open(path, 'r', encoding='utf-8') as file:
+            if extension == '.json':
+                rows = iter_json_array(file)
+            else:
+                rows = iter_csv_rows(file, FIELDS)
+            with transaction.atomic():
+                if options['upsert']:
+                    existing = set(
+                        Ingredient.objects.values_list(*FIELDS))
+                else:
+                    self.clear_table()
+                    existing = set()
+                loaded = self.load(rows, existing, options['batch_size'],
+                                   use_copy)
+        elapsed = perf_counter() - started
 
-            if DB_ENGINE == "django.db.backends.sqlite3":
-                cursor.execute(f"DELETE FROM SQLite_sequence WHERE name='{Ingredient._meta.db_table}'")
+        invalidate_ingredient_index()
+        bump_reference_version(Ingredient)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено ингредиентов: {loaded} за {elapsed:.2f} с '
+            f'({loaded / max(elapsed, 1e-9):.0f} строк/с, '
+            f'{"COPY" if use_copy else "bulk_create"}).'
+        ))
 
-        cursor.close()
+    @staticmethod
+    def clear_table():
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'ALTER SEQUENCE {table}_id_seq RESTART WITH 1')
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    f"DELETE FROM SQLite_sequence WHERE name='{table}'")
 
-        with open(
-            f"{DATA_FOLDER}/ingredients.json",
-            'r',
-            encoding='utf-8'
-            ) as json_file:
-            json_data = json.load(json_file)
-            for json_element in json_data:
-                Ingredient.objects.create(**json_element)
+    @staticmethod
+    def load(rows, existing, batch_size, use_copy):
+        """Вставляет пачками строки, которых ещё нет в existing."""
+        loaded = 0
+        for batch in batched(rows, batch_size):
+            new_rows = []
+            for row in batch:
+                key = (row['name'].strip(), row['measurement_unit'].strip())
+                if key not in existing:
+                    existing.add(key)
+                    new_rows.append(key)
+            if not new_rows:
+                continue
+            if use_copy:
+                with connection.cursor() as cursor:
+                    copy_rows(cursor, Ingredient._meta.db_table, FIELDS,
+                              new_rows)
+            else:
+                Ingredient.objects.bulk_create(
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in new_rows
+                )
+            loaded += len(new_rows)
+        return loaded
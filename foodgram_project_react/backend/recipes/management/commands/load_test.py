@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+from time import perf_counter
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark_api import percentile
+
+DEFAULT_PATHS = ('/api/recipes/', '/api/recipes/?limit=20',
+                 '/api/tags/', '/api/ingredients/?name=м')
+
+
+def read_rss_mb(pid):
+    """Суммарный RSS процесса и его потомков (воркеров gunicorn)."""
+    total = 0
+    pending = [str(pid)]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as file:
+                    pending.extend(file.read().split())
+        except FileNotFoundError:
+            continue
+    return round(total / 1024, 1)
+
+
+class LoadTest:
+    """Одновременные клиенты поверх asyncio без сторонних библиотек.
+
+    Медленные клиенты отправляют заголовки запроса в два приёма с паузой
+    между ними, как клиенты на плохой сети: синхронный воркер всё это
+    время занят, асинхронный сервер ждёт их в цикле событий.
+    """
+
+    def __init__(self, url, paths, token, slow_delay):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.paths = paths
+        self.headers = f'Host: {parts.netloc}\r\nConnection: close\r\n'
+        if token:
+            self.headers += f'Authorization: Token {token}\r\n'
+        self.slow_delay = slow_delay
+        self.timings = []
+        self.errors = 0
+        self.running = True
+
+    async def request(self, path, slow=False):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = f'GET {quote(path, safe="/?&=%")} HTTP/1.1\r\n'
+            if slow:
+                writer.write(head.encode())
+                await writer.drain()
+                await asyncio.sleep(self.slow_delay)
+                head = ''
+            writer.write(f'{head}{self.headers}\r\n'.encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+        finally:
+            writer.close()
+        return int(status_line.split()[1])
+
+    async def client(self, queue):
+        while True:
+            try:
+                number = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = perf_counter()
+            try:
+                status = await self.request(
+                    self.paths[number % len(self.paths)])
+            except (OSError, IndexError, ValueError):
+                status = None
+            if status != 200:
+                self.errors += 1
+                continue
+            self.timings.append((perf_counter() - started) * 1000)
+
+    async def slow_client(self):
+        while self.running:
+            try:
+                await self.request(self.paths[0], slow=True)
+            except (OSError, IndexError, ValueError):
+                await asyncio.sleep(self.slow_delay)
+
+    async def sample_rss(self, pid, samples):
+        while self.running:
+            samples.append(read_rss_mb(pid))
+            await asyncio.sleep(0.5)
+
+    async def run(self, requests, concurrency, slow_clients, pid):
+        queue = asyncio.Queue()
+        for number in range(requests):
+            queue.put_nowait(number)
+        rss = []
+        background = [asyncio.ensure_future(self.slow_client())
+                      for _ in range(slow_clients)]
+        if pid:
+            background.append(
+                asyncio.ensure_future(self.sample_rss(pid, rss)))
+        # Медленные клиенты успевают занять соединения до основной нагрузки.
+        await asyncio.sleep(min(self.slow_delay, 1) if slow_clients else 0)
+        started = perf_counter()
+        await asyncio.gather(*(self.client(queue)
+                               for _ in range(concurrency)))
+        elapsed = perf_counter() - started
+        self.running = False
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        return elapsed, rss
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест запущенного сервера: одновременные и '
+            'медленные клиенты, пропускная способность, задержки и память. '
+            'Сравнивает WSGI и ASGI при одинаковом числе воркеров.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Адрес для запросов; можно указать несколько раз.')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--slow-clients', type=int, default=0)
+        parser.add_argument(
+            '--slow-delay', type=float, default=2.0,
+            help='Пауза медленного клиента посреди запроса, секунды.')
+        parser.add_argument(
+            '--token', help='Токен для заголовка Authorization.')
+        parser.add_argument(
+            '--pid', type=int,
+            help='PID мастер-процесса сервера для замера памяти.')
+        parser.add_argument('--output', help='Куда сохранить результат.')
+        parser.add_argument(
+            '--baseline', help='Сохранённый результат для сравнения.')
+
+    def handle(self, *args, **options):
+        test = LoadTest(options['url'], options['paths'] or DEFAULT_PATHS,
+                        options['token'], options['slow_delay'])
+        loop = asyncio.new_event_loop()
+        try:
+            elapsed, rss = loop.run_until_complete(test.run(
+                options['requests'], options['concurrency'],
+                options['slow_clients'], options['pid']))
+        finally:
+            loop.close()
+        if not test.timings:
+            raise CommandError(
+                f'Нет успешных ответов от {options["url"]}, ошибок: '
+                f'{test.errors}.')
+
+        result = {
+            'requests': len(test.timings),
+            'errors': test.errors,
+            'concurrency': options['concurrency'],
+            'slow_clients': options['slow_clients'],
+            'rps': round(len(test.timings) / elapsed, 1),
+            'p50_ms': round(percentile(test.timings, 0.5), 2),
+            'p95_ms': round(percentile(test.timings, 0.95), 2),
+            'max_ms': round(max(test.timings), 2),
+            'rss_mb': max(rss) if rss else None,
+        }
+        report = json.dumps(result, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+        self.stdout.write(report)
+        if options['baseline']:
+            self.compare(result, options['baseline'])
+
+    def compare(self, result, path):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        self.stdout.write('\nСравнение с базовым прогоном:')
+        for key in ('rps', 'p50_ms', 'p95_ms', 'errors', 'rss_mb'):
+            self.stdout.write(
+                f'{key}: {baseline.get(key)} -> {result.get(key)}')
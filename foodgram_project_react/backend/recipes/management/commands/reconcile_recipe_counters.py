@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Сверяет favorites_count и in_carts_count рецептов с '
+            'фактическими данными и исправляет расхождения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = Recipe.objects.reconcile_counters(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлены счётчики рецептов: {fixed}'))
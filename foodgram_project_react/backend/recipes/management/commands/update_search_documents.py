@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.search import update_search_documents
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает поисковые документы всех рецептов после '
+            'загрузки данных в обход сигналов')
+
+    def handle(self, *args, **options):
+        update_search_documents()
+        self.stdout.write(self.style.SUCCESS(
+            'Поисковые документы рецептов обновлены'))
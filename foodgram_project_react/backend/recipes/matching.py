@@ -0,0 +1,217 @@
+"""Подбор рецептов по имеющимся у пользователя ингредиентам.
+
+Индекс в памяти процесса хранит для каждого ингредиента отсортированный
+массив позиций рецептов (NumPy int32), а состав рецептов — в виде CSR:
+indptr/indices. Покрытие рецепта — доля его ингредиентов, которые есть
+у пользователя; считается одним np.bincount по спискам ингредиентов
+запроса.
+
+Изменения состава рецептов не перестраивают индекс: сигналы пишут id
+рецептов в журнал в кеше (счётчик SEQ и записи по номерам), и каждый
+процесс при следующем запросе дочитывает журнал и правит только
+затронутые списки. Полная перестройка — при смене версии, потере
+записей журнала или слишком большом числе изменений.
+"""
+import threading
+from collections import namedtuple
+from uuid import uuid4
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import IngredientInRecipe
+
+VERSION_KEY = 'recipes:match_index:version'
+
+MatchState = namedtuple('MatchState', (
+    'version', 'seq', 'recipe_ids', 'sizes', 'postings', 'indptr',
+    'indices', 'overrides'
+))
+
+EMPTY = np.empty(0, dtype=np.int32)
+
+
+def seq_key(version):
+    return f'recipes:match_index:{version}:seq'
+
+
+def change_key(version, seq):
+    return f'recipes:match_index:{version}:change:{seq}'
+
+
+def build_state(version, seq):
+    rows = IngredientInRecipe.objects.order_by(
+        'recipe_id', 'ingredient_id').values_list(
+            'recipe_id', 'ingredient_id')
+    pairs = np.array(list(rows.iterator()), dtype=np.int64).reshape(-1, 2)
+    recipe_column, ingredient_column = pairs[:, 0], pairs[:, 1]
+    recipe_ids, positions, sizes = np.unique(
+        recipe_column, return_inverse=True, return_counts=True)
+    indptr = np.zeros(len(recipe_ids) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=indptr[1:])
+
+    # Устойчивая сортировка сохраняет порядок позиций внутри ингредиента.
+    order = np.argsort(ingredient_column, kind='stable')
+    ingredient_ids, starts = np.unique(ingredient_column[order],
+                                       return_index=True)
+    postings = dict(zip(
+        ingredient_ids.tolist(),
+        np.split(positions[order].astype(np.int32), starts[1:])
+    ))
+    return MatchState(version, seq, recipe_ids, sizes.astype(np.int32),
+                      postings, indptr, ingredient_column.astype(np.int32),
+                      {})
+
+
+def apply_changes(state, seq, recipe_ids):
+    """Новое состояние с пересчитанными рецептами или None.
+
+    None — изменения нельзя применить на месте (новый рецепт с id
+    меньше последнего), нужна полная перестройка.
+    """
+    current = {recipe_id: set() for recipe_id in recipe_ids}
+    for recipe_id, ingredient_id in IngredientInRecipe.objects.filter(
+            recipe_id__in=recipe_ids).values_list(
+                'recipe_id', 'ingredient_id'):
+        current[recipe_id].add(ingredient_id)
+
+    all_ids, sizes = state.recipe_ids, state.sizes.copy()
+    postings, overrides = dict(state.postings), dict(state.overrides)
+    for recipe_id in sorted(recipe_ids):
+        position = int(np.searchsorted(all_ids, recipe_id))
+        if position < len(all_ids) and all_ids[position] == recipe_id:
+            old = overrides.get(position, state.indices[
+                state.indptr[position]:state.indptr[position + 1]])
+            old = set(old.tolist())
+        elif position == len(all_ids):
+            if not current[recipe_id]:
+                continue
+            all_ids = np.append(all_ids, recipe_id)
+            sizes = np.append(sizes, 0).astype(np.int32)
+            old = set()
+        else:
+            return None
+
+        new = current[recipe_id]
+        for ingredient_id in old - new:
+            array = postings[ingredient_id]
+            postings[ingredient_id] = np.delete(
+                array, np.searchsorted(array, position))
+        for ingredient_id in new - old:
+            array = postings.get(ingredient_id, EMPTY)
+            postings[ingredient_id] = np.insert(
+                array, np.searchsorted(array, position), position
+            ).astype(np.int32)
+        sizes[position] = len(new)
+        overrides[position] = np.array(sorted(new), dtype=np.int32)
+    return state._replace(seq=seq, recipe_ids=all_ids, sizes=sizes,
+                          postings=postings, overrides=overrides)
+
+
+class RecipeMatchIndex:
+    """Инвертированный индекс ингредиент -> рецепты для подбора."""
+
+    def __init__(self):
+        self._state = None
+        self._lock = threading.Lock()
+
+    def match(self, ingredient_ids, limit):
+        """До limit кортежей (id рецепта, покрытие, есть ингредиентов).
+
+        Порядок: покрытие, число имеющихся ингредиентов, новые рецепты.
+        """
+        state = self._snapshot()
+        arrays = [state.postings[ingredient_id]
+                  for ingredient_id in set(ingredient_ids)
+                  if ingredient_id in state.postings]
+        if not arrays:
+            return []
+        have = np.bincount(np.concatenate(arrays),
+                           minlength=len(state.recipe_ids))
+        matched = np.flatnonzero(have)
+        have = have[matched]
+        coverage = have / state.sizes[matched]
+        if len(matched) > limit:
+            # Кандидаты — не хуже limit-го по покрытию, с учётом равных.
+            threshold = np.partition(coverage, -limit)[-limit]
+            candidates = coverage >= threshold
+            matched = matched[candidates]
+            have = have[candidates]
+            coverage = coverage[candidates]
+        recipe_ids = state.recipe_ids[matched]
+        order = np.lexsort((-recipe_ids, -have, -coverage))[:limit]
+        return list(zip(recipe_ids[order].tolist(),
+                        coverage[order].tolist(), have[order].tolist()))
+
+    def _snapshot(self):
+        version = get_version()
+        seq = cache.get(seq_key(version), 0)
+        state = self._state
+        if state is None or state.version != version or state.seq < seq:
+            with self._lock:
+                state = self._refresh(version, seq)
+        return state
+
+    def _refresh(self, version, seq):
+        state = self._state
+        if state is not None and state.version == version:
+            if state.seq >= seq:
+                return state
+            state = self._apply_journal(state, version, seq)
+        else:
+            state = None
+        if state is None:
+            state = build_state(version, seq)
+        self._state = state
+        return state
+
+    @staticmethod
+    def _apply_journal(state, version, seq):
+        if (seq - state.seq > settings.RECIPE_MATCH_MAX_CHANGES
+                or len(state.overrides) > settings.RECIPE_MATCH_MAX_CHANGES):
+            return None
+        keys = [change_key(version, number)
+                for number in range(state.seq + 1, seq + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            return None
+        recipe_ids = set()
+        for ids in changes.values():
+            recipe_ids.update(ids)
+        return apply_changes(state, seq, recipe_ids)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        new_version = uuid4().hex
+        if cache.add(VERSION_KEY, new_version, None):
+            cache.set(seq_key(new_version), 0, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_match_index():
+    version = uuid4().hex
+    cache.set(seq_key(version), 0, None)
+    cache.set(VERSION_KEY, version, None)
+
+
+def mark_recipes_changed(recipe_ids):
+    """Записывает в журнал рецепты, у которых сменился состав."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    version = get_version()
+    try:
+        seq = cache.incr(seq_key(version))
+    except ValueError:
+        # Счётчик вытеснен из кеша: журнал неполон, индекс перестроится.
+        invalidate_match_index()
+        return
+    cache.set(change_key(version, seq), recipe_ids,
+              settings.RECIPE_MATCH_CHANGE_TIMEOUT)
+
+
+match_index = RecipeMatchIndex()
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+INGREDIENT_TABLE = 'recipes_ingredient'
+
+CREATE_INDEXES = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    # Нечёткий поиск (name__trigram_similar).
+    f'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_trgm '
+    f'ON {INGREDIENT_TABLE} USING gin (name gin_trgm_ops)',
+    # Префиксный поиск name__istartswith без полного сканирования.
+    f'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_prefix '
+    f'ON {INGREDIENT_TABLE} (UPPER(name::text) text_pattern_ops)',
+)
+
+DROP_INDEXES = (
+    'DROP INDEX IF EXISTS recipes_ingredient_name_trgm',
+    'DROP INDEX IF EXISTS recipes_ingredient_name_prefix',
+)
+
+
+def run_on_postgresql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_auto_20230313_1952'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_INDEXES),
+            run_on_postgresql(DROP_INDEXES),
+        ),
+    ]
@@ -0,0 +1,58 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+RECIPE_TABLE = 'recipes_recipe'
+
+CREATE_INDEX = (
+    f'CREATE INDEX IF NOT EXISTS recipes_recipe_search_vector '
+    f'ON {RECIPE_TABLE} USING gin (search_vector)'
+)
+DROP_INDEX = 'DROP INDEX IF EXISTS recipes_recipe_search_vector'
+
+
+def run_on_postgresql(statement):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(statement)
+    return operation
+
+
+def fill_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import OuterRef, Subquery, TextField
+
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    ingredient_names = Subquery(
+        IngredientInRecipe.objects.filter(recipe=OuterRef('pk')).order_by()
+        .values('recipe')
+        .annotate(names=StringAgg('ingredient__name', ' '))
+        .values('names'),
+        output_field=TextField()
+    )
+    Recipe.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='russian')
+        + SearchVector(ingredient_names, weight='B', config='russian')
+        + SearchVector('text', weight='C', config='russian')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый документ'),
+        ),
+        migrations.RunPython(run_on_postgresql(CREATE_INDEX),
+                             run_on_postgresql(DROP_INDEX)),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def fill_search_vector(apps, schema_editor):
+    """Пересчёт документов с «ё» как «е», как в recipes.search.fold."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import OuterRef, Subquery, TextField, Value
+    from django.db.models.functions import Lower, Replace
+
+    def fold(expression):
+        return Replace(Lower(expression), Value('ё'), Value('е'))
+
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    ingredient_names = Subquery(
+        IngredientInRecipe.objects.filter(recipe=OuterRef('pk')).order_by()
+        .values('recipe')
+        .annotate(names=StringAgg('ingredient__name', ' '))
+        .values('names'),
+        output_field=TextField()
+    )
+    Recipe.objects.update(search_vector=(
+        SearchVector(fold('name'), weight='A', config='russian')
+        + SearchVector(fold(ingredient_names), weight='B', config='russian')
+        + SearchVector(fold('text'), weight='C', config='russian')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.db.models import constraints
+from django.db.models import (constraints, Count, Exists, F, OuterRef,
+                              Prefetch, Subquery, Value)
+from django.db.models.functions import Coalesce, Greatest
 
 User = get_user_model()
 
@@ -59,6 +62,89 @@ class TagInRecipe(models.Model):
     tag = models.ForeignKey('Tag', on_delete=models.CASCADE)
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Выборки рецептов для отображения в API."""
+
+    def with_user_flags(self, user):
+        """Флаги is_favorited / is_in_shopping_cart одним запросом."""
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, models.BooleanField()),
+                is_in_shopping_cart=Value(False, models.BooleanField())
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')))
+        )
+
+    def newest_per_author(self, limit):
+        """Не больше limit последних рецептов каждого автора.
+
+        Коррелированный подзапрос с LIMIT по индексу (author, pub_date):
+        фильтр по оконным функциям появился только в Django 4.2.
+        """
+        newest = self.model.objects.filter(
+            author=OuterRef('author')
+        ).order_by('-pub_date', '-id').values('pk')[:limit]
+        return self.filter(pk__in=Subquery(newest))
+
+    def with_related(self):
+        """Автор, теги и ингредиенты без запросов на каждый рецепт."""
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipes',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient')
+            )
+        )
+
+    def change_counter(self, recipe_id, field, delta):
+        """Атомарно меняет счётчик favorites_count или in_carts_count."""
+        return self.filter(pk=recipe_id).update(
+            **{field: Greatest(F(field) + delta, 0)})
+
+    def with_actual_counts(self):
+        """Фактическое число добавлений в избранное и списки покупок."""
+        def count(model):
+            return Coalesce(Subquery(
+                model.objects.filter(recipe=OuterRef('pk')).order_by()
+                .values('recipe').annotate(count=Count('pk'))
+                .values('count'),
+                output_field=models.IntegerField()
+            ), 0)
+
+        return self.annotate(actual_favorites=count(Favorite),
+                             actual_in_carts=count(ShoppingCart))
+
+    def reconcile_counters(self, batch_size=1000):
+        """Исправляет разошедшиеся счётчики, возвращает число рецептов."""
+        fields = ('favorites_count', 'in_carts_count')
+        stale = []
+        fixed = 0
+        recipes = self.with_actual_counts().only('id', *fields).order_by()
+        for recipe in recipes.iterator():
+            actual = (recipe.actual_favorites, recipe.actual_in_carts)
+            if (recipe.favorites_count, recipe.in_carts_count) == actual:
+                continue
+            recipe.favorites_count, recipe.in_carts_count = actual
+            stale.append(recipe)
+            if len(stale) >= batch_size:
+                self.model.objects.bulk_update(stale, fields)
+                fixed += len(stale)
+                stale = []
+        if stale:
+            self.model.objects.bulk_update(stale, fields)
+            fixed += len(stale)
+        return fixed
+
+
+SEPARATELY_UPDATED_FIELDS = frozenset((
+    'favorites_count', 'in_carts_count', 'search_vector'))
+
+
 class Recipe(models.Model):
     """Рецепт."""
 
@@ -75,6 +161,18 @@ class Recipe(models.Model):
         default=None,
         verbose_name='Изображение')
 
+    image_thumbnail = models.ImageField(
+        upload_to='recipe/images/renditions/',
+        blank=True,
+        editable=False,
+        verbose_name='Миниатюра')
+
+    image_medium = models.ImageField(
+        upload_to='recipe/images/renditions/',
+        blank=True,
+        editable=False,
+        verbose_name='Изображение среднего размера')
+
     tags = models.ManyToManyField('Tag',
                                   through='TagInRecipe',
                                   verbose_name='Список тегов',
@@ -98,14 +196,54 @@ class Recipe(models.Model):
         auto_now_add=True
     )
 
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном')
+
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок')
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый документ')
+
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='recipe_author_pub_date_idx'),
+            models.Index(fields=('-favorites_count', '-pub_date', '-id'),
+                         name='recipe_popularity_idx'),
+        )
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Счётчики и поисковый документ меняются отдельными UPDATE
+        # (change_counter, update_search_documents). Сохранение
+        # изменённого рецепта их не пишет, иначе значения, прочитанные
+        # до параллельного UPDATE, затрут его результат.
+        if (not args and not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            skipped = SEPARATELY_UPDATED_FIELDS | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
 
 class ShoppingCart(models.Model):
     """Список покупок."""
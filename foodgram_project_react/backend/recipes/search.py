@@ -0,0 +1,206 @@
+"""Полнотекстовый поиск рецептов по названию, ингредиентам и описанию.
+
+На PostgreSQL поисковый документ хранится в Recipe.search_vector (GIN-
+индекс из миграции 0008), совпадения ранжирует SearchRank. На других
+СУБД используется инвертированный индекс в памяти процесса, устроенный
+как индекс ингредиентов: строится при первом поиске и перестраивается
+при смене версии в кеше.
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import (Case, F, FloatField, OuterRef, Subquery,
+                              TextField, Value, When)
+from django.db.models.functions import Lower, Replace
+
+from .models import IngredientInRecipe, Recipe
+
+VERSION_KEY = 'recipes:search_index:version'
+TOKEN_RE = re.compile(r'\w+')
+# Веса полей: название важнее ингредиентов, ингредиенты важнее описания.
+WEIGHTS = {'name': 1.0, 'ingredients': 0.4, 'text': 0.1}
+
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+
+
+def fold(expression):
+    """Текст для поискового документа: нижний регистр, «ё» как «е»."""
+    return Replace(Lower(expression), Value('ё'), Value('е'))
+
+
+def prefix_query(term):
+    """tsquery «все слова запроса как префиксы», как у индекса в памяти.
+
+    Слова нормализуются как в документе (tokenize и fold), в запрос
+    попадают только буквы и цифры, без спецсимволов tsquery.
+    """
+    return ' & '.join(f'{word}:*' for word in tokenize(term))
+
+
+_pending = threading.local()
+
+
+def schedule_search_update(recipe_id):
+    """Пересчёт документа рецепта после коммита.
+
+    Рецепт, сохранённый за транзакцию несколько раз (создание, затем
+    состав), пересчитывается одним запросом.
+    """
+    if getattr(_pending, 'recipe_ids', None) is None:
+        _pending.recipe_ids = set()
+    _pending.recipe_ids.add(recipe_id)
+    transaction.on_commit(flush_search_updates)
+
+
+def flush_search_updates():
+    recipe_ids = getattr(_pending, 'recipe_ids', None)
+    if recipe_ids:
+        _pending.recipe_ids = set()
+        update_search_documents(recipe_ids)
+
+
+def update_search_documents(recipe_ids=None):
+    """Пересчитывает поисковые документы (None — у всех рецептов)."""
+    if not is_postgresql():
+        invalidate_search_index()
+        return
+
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+
+    config = settings.RECIPE_SEARCH_CONFIG
+    ingredient_names = Subquery(
+        IngredientInRecipe.objects.filter(recipe=OuterRef('pk')).order_by()
+        .values('recipe')
+        .annotate(names=StringAgg('ingredient__name', ' '))
+        .values('names'),
+        output_field=TextField()
+    )
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    recipes.update(search_vector=(
+        SearchVector(fold('name'), weight='A', config=config)
+        + SearchVector(fold(ingredient_names), weight='B', config=config)
+        + SearchVector(fold('text'), weight='C', config=config)
+    ))
+
+
+class RecipeSearchIndex:
+    """Инвертированный индекс рецептов в памяти процесса.
+
+    Токены хранятся отсортированными, слово запроса совпадает со всеми
+    токенами, которые с него начинаются. Рецепт должен содержать все
+    слова запроса; вес — сумма весов полей, где слово нашлось.
+    """
+
+    def __init__(self):
+        self._data = ([], [])
+        self._version = object()
+        self._lock = threading.Lock()
+
+    def search(self, term):
+        """Список (id, ранг) по убыванию ранга."""
+        tokens, postings = self._snapshot()
+        scores = None
+        for word in set(tokenize(term)):
+            word_scores = defaultdict(float)
+            position = bisect_left(tokens, word)
+            while (position < len(tokens)
+                   and tokens[position].startswith(word)):
+                for recipe_id, weight in postings[position].items():
+                    word_scores[recipe_id] = max(
+                        word_scores[recipe_id], weight)
+                position += 1
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {recipe_id: score + word_scores[recipe_id]
+                          for recipe_id, score in scores.items()
+                          if recipe_id in word_scores}
+        if not scores:
+            return []
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+    def _snapshot(self):
+        version = get_version()
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self._build(version)
+        return self._data
+
+    def _build(self, version):
+        index = defaultdict(lambda: defaultdict(float))
+
+        def add(recipe_id, text, weight):
+            for token in tokenize(text):
+                index[token][recipe_id] += weight
+
+        for recipe_id, name, text in Recipe.objects.values_list(
+                'id', 'name', 'text').iterator():
+            add(recipe_id, name, WEIGHTS['name'])
+            add(recipe_id, text, WEIGHTS['text'])
+        for recipe_id, name in IngredientInRecipe.objects.values_list(
+                'recipe_id', 'ingredient__name').iterator():
+            add(recipe_id, name, WEIGHTS['ingredients'])
+        tokens = sorted(index)
+        self._data = (tokens, [dict(index[token]) for token in tokens])
+        self._version = version
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_search_index():
+    cache.set(VERSION_KEY, uuid4().hex, None)
+
+
+search_index = RecipeSearchIndex()
+
+
+def search_recipes(queryset, term):
+    """Рецепты queryset, подходящие под запрос, с аннотацией rank.
+
+    Порядок — по убыванию rank, затем новые первыми.
+    """
+    if is_postgresql():
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        term = prefix_query(term)
+        if not term:
+            return queryset.none()
+        query = SearchQuery(term, search_type='raw',
+                            config=settings.RECIPE_SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date', '-id')
+
+    matches = search_index.search(term)[:settings.RECIPE_SEARCH_LIMIT]
+    if not matches:
+        return queryset.none()
+    rank = Case(
+        *(When(pk=recipe_id, then=Value(score))
+          for recipe_id, score in matches),
+        output_field=FloatField()
+    )
+    return queryset.filter(pk__in=[recipe_id for recipe_id, _ in matches]
+                           ).annotate(rank=rank).order_by(
+                               '-rank', '-pub_date', '-id')
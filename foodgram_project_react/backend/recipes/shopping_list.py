@@ -0,0 +1,111 @@
+"""Список покупок: приведение единиц и объединение ингредиентов.
+
+Количества одного ингредиента в совместимых единицах (г и кг, мл и л)
+приводятся к базовой единице и складываются, в том числе у разных
+записей Ingredient с одинаковым названием. Готовый список пользователя
+хранится в кеше и сбрасывается сигналами при изменении его списка
+покупок и состава рецептов в нём (см. recipes.signals).
+"""
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+
+from .models import IngredientInRecipe, ShoppingCart
+
+# Единица -> (базовая единица, множитель). Ложки, стаканы и штуки не
+# переводятся: без плотности продукта их нельзя привести к массе.
+UNITS = {
+    'мг': ('г', Decimal('0.001')),
+    'г': ('г', Decimal(1)),
+    'кг': ('г', Decimal(1000)),
+    'мл': ('мл', Decimal(1)),
+    'л': ('мл', Decimal(1000)),
+}
+# Базовая единица -> (крупная единица, с какого количества её показывать).
+DISPLAY_UNITS = {
+    'г': ('кг', Decimal(1000)),
+    'мл': ('л', Decimal(1000)),
+}
+
+
+def shopping_list_key(user_id):
+    return f'recipes:shopping_list:{user_id}'
+
+
+def normalize_unit(unit):
+    return unit.strip().lower().rstrip('.')
+
+
+def normalize_name(name):
+    return ' '.join(name.lower().replace('ё', 'е').split())
+
+
+def format_amount(amount):
+    if amount == amount.to_integral_value():
+        return int(amount)
+    return amount.quantize(Decimal('0.001')).normalize()
+
+
+def aggregate(rows):
+    """Объединяет строки (name, measurement_unit, amount) списка.
+
+    Возвращает строки в порядке названий, количество в крупной единице,
+    если его хватает хотя бы на одну такую единицу.
+    """
+    merged = OrderedDict()
+    for row in rows:
+        unit = normalize_unit(row['measurement_unit'])
+        base_unit, factor = UNITS.get(unit, (unit, 1))
+        key = (normalize_name(row['name']), base_unit)
+        if key not in merged:
+            # Непереводимая единица показывается как в первой строке.
+            merged[key] = {'name': row['name'], 'amount': Decimal(0),
+                           'measurement_unit': base_unit if unit in UNITS
+                           else row['measurement_unit']}
+        merged[key]['amount'] += row['amount'] * factor
+
+    result = []
+    for row in merged.values():
+        display = DISPLAY_UNITS.get(row['measurement_unit'])
+        if display is not None and row['amount'] >= display[1]:
+            row['measurement_unit'] = display[0]
+            row['amount'] /= display[1]
+        row['amount'] = format_amount(row['amount'])
+        result.append(row)
+    return result
+
+
+def get_shopping_list(user):
+    key = shopping_list_key(user.pk)
+    shopping_list = cache.get(key)
+    if shopping_list is None:
+        shopping_list = aggregate(
+            IngredientInRecipe.objects.filter(
+                recipe__shopping_card_recipes__user=user
+            ).values(
+                name=F('ingredient__name'),
+                measurement_unit=F('ingredient__measurement_unit')
+            ).annotate(
+                amount=Sum('amount')
+            ).order_by('name', 'measurement_unit')
+        )
+        cache.set(key, shopping_list, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+    return shopping_list
+
+
+def invalidate_shopping_lists(user_ids):
+    cache.delete_many([shopping_list_key(user_id) for user_id in user_ids])
+
+
+def invalidate_recipe_carts(recipes):
+    """Сбрасывает списки пользователей, у которых в покупках recipes.
+
+    recipes — queryset или список id рецептов.
+    """
+    invalidate_shopping_lists(set(
+        ShoppingCart.objects.filter(recipe__in=recipes)
+        .values_list('user_id', flat=True)
+    ))
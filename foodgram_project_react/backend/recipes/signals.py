@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .feed import invalidate_author_feed
+from .images import needs_renditions, schedule_renditions
+from .ingredient_index import invalidate_ingredient_index
+from .matching import mark_recipes_changed
+from .models import Favorite, Ingredient, Recipe, ShoppingCart
+from .search import (invalidate_search_index, schedule_search_update,
+                     update_search_documents)
+from .shopping_list import invalidate_recipe_carts, invalidate_shopping_lists
+from .user_state import invalidate_recipe_state
+
+# Состав ингредиентов рецепта изменился (аргумент recipe). Сохранение
+# IngredientInRecipe идёт пачками через bulk_*, без post_save.
+recipe_ingredients_changed = Signal()
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def reset_recipe_state(sender, instance, **kwargs):
+    # После коммита: иначе параллельный запрос успеет закешировать
+    # состояние до изменения, а откат оставит в кеше несуществующее.
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_recipe_state(user_id))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def reset_ingredient_index(sender, **kwargs):
+    # После коммита, чтобы индекс не перестроили по старым данным.
+    transaction.on_commit(invalidate_ingredient_index)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_documents(
+            instance.recipe_ingredients.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def update_ingredient_search_on_delete(sender, instance, **kwargs):
+    # Связи удаляются каскадом, поэтому рецепты запоминаются заранее.
+    recipe_ids = list(instance.recipe_ingredients.values_list('pk',
+                                                              flat=True))
+    transaction.on_commit(lambda: update_search_documents(recipe_ids))
+    transaction.on_commit(lambda: mark_recipes_changed(recipe_ids))
+
+
+@receiver(post_save, sender=Recipe)
+def build_image_renditions(sender, instance, raw=False, **kwargs):
+    if not raw and needs_renditions(instance):
+        schedule_renditions(instance)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def reset_author_feed(sender, instance, **kwargs):
+    # После коммита, чтобы ленту не пересобрали по старым данным.
+    author_id = instance.author_id
+    transaction.on_commit(lambda: invalidate_author_feed(author_id))
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search(sender, instance, raw=False, update_fields=None,
+                         **kwargs):
+    if raw or (update_fields and not {'name', 'text'} & set(update_fields)):
+        return
+    schedule_search_update(instance.pk)
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def update_recipe_search_ingredients(sender, recipe, **kwargs):
+    schedule_search_update(recipe.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def reset_recipe_search(sender, **kwargs):
+    invalidate_search_index()
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def update_match_index(sender, **kwargs):
+    recipe_id = (kwargs.get('recipe') or kwargs['instance']).pk
+    transaction.on_commit(lambda: mark_recipes_changed((recipe_id,)))
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def reset_shopping_list(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_shopping_lists((user_id,)))
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def reset_recipe_shopping_lists(sender, recipe, **kwargs):
+    recipe_id = recipe.pk
+    transaction.on_commit(lambda: invalidate_recipe_carts((recipe_id,)))
+
+
+@receiver(post_save, sender=Ingredient)
+def reset_ingredient_shopping_lists(sender, instance, raw=False, **kwargs):
+    if not raw:
+        recipe_ids = list(instance.recipe_ingredients.values_list(
+            'pk', flat=True))
+        transaction.on_commit(lambda: invalidate_recipe_carts(recipe_ids))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def reset_shopping_lists_on_delete(sender, instance, **kwargs):
+    recipe_ids = list(instance.recipe_ingredients.values_list('pk',
+                                                              flat=True))
+    transaction.on_commit(lambda: invalidate_recipe_carts(recipe_ids))
@@ -0,0 +1,42 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Favorite, ShoppingCart
+
+RecipeState = namedtuple('RecipeState', ('favorites', 'shopping_cart'))
+
+
+def recipe_state_key(user_id):
+    return f'recipes:user_state:{user_id}'
+
+
+def get_recipe_state(user):
+    """Множества id рецептов в избранном и в списке покупок пользователя.
+
+    Хранятся в кеше и сбрасываются сигналами при изменении
+    Favorite и ShoppingCart (см. recipes.signals).
+    """
+    if user.is_anonymous:
+        return RecipeState(frozenset(), frozenset())
+
+    key = recipe_state_key(user.pk)
+    state = cache.get(key)
+    if state is None:
+        state = RecipeState(
+            favorites=frozenset(
+                Favorite.objects.filter(user=user)
+                .values_list('recipe_id', flat=True)
+            ),
+            shopping_cart=frozenset(
+                ShoppingCart.objects.filter(user=user)
+                .values_list('recipe_id', flat=True)
+            ),
+        )
+        cache.set(key, state, settings.RECIPE_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def invalidate_recipe_state(user_id):
+    cache.delete(recipe_state_key(user_id))
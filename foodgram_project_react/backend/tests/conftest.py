@@ -0,0 +1,105 @@
+from itertools import count
+
+import pytest
+from django.core.cache import caches
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from users.models import Subscription
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for cache in caches.all():
+        cache.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@foodgram.fake',
+        password='1234567'
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    token, _ = Token.objects.get_or_create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def ingredients():
+    return [
+        Ingredient.objects.create(name=f'Ингредиент {i}',
+                                  measurement_unit='г')
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def tag():
+    return Tag.objects.create(name='Завтрак', color='#E26C2D',
+                              slug='breakfast')
+
+
+@pytest.fixture
+def make_recipes(user, ingredients, tag):
+    def make_recipes(count):
+        recipes = []
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                author=user, name=f'Рецепт {i}', text='Текст',
+                cooking_time=10
+            )
+            recipe.tags.set((tag,))
+            IngredientInRecipe.objects.bulk_create(
+                IngredientInRecipe(recipe=recipe, ingredient=ingredient,
+                                   amount=i + 1)
+                for ingredient in ingredients
+            )
+            recipes.append(recipe)
+        return recipes
+    return make_recipes
+
+
+@pytest.fixture
+def image_base64():
+    return (
+        'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywa'
+        'AAAACVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQI'
+        'mWNoAAAAggCByxOyYQAAAABJRU5ErkJggg=='
+    )
+
+
+@pytest.fixture
+def make_authors(django_user_model, user):
+    numbers = count()
+
+    def make_authors(authors_count, recipes_per_author=3):
+        authors = []
+        for _ in range(authors_count):
+            number = next(numbers)
+            author = django_user_model.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@foodgram.fake',
+                password='1234567'
+            )
+            for index in range(recipes_per_author):
+                Recipe.objects.create(author=author, name=f'Рецепт {index}',
+                                      text='Текст', cooking_time=5)
+            Subscription.objects.create(user=user, author=author)
+            authors.append(author)
+        return authors
+    return make_authors
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import include, path, resolve
+from rest_framework import routers
+
+from api.async_views import async_read_urls
+from api.views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
+                       TagViewSet)
+
+router = routers.DefaultRouter()
+router.register('recipes', RecipeViewSet, basename='recipe')
+router.register('tags', TagViewSet)
+router.register('ingredients', IngredientViewSet)
+router.register('users', CustomUserViewSet, basename='users')
+
+urlpatterns = [
+    path('api/', include(async_read_urls(
+        router.urls, (RecipeViewSet, TagViewSet, IngredientViewSet)))),
+]
+
+
+@pytest.mark.urls('tests.test_async_views')
+class TestAsyncReadViews:
+
+    def test_only_read_actions_are_async(self):
+        for url in ('/api/recipes/', '/api/recipes/1/', '/api/tags/'):
+            assert asyncio.iscoroutinefunction(resolve(url).func)
+        for url in ('/api/recipes/feed/', '/api/users/'):
+            assert not asyncio.iscoroutinefunction(resolve(url).func)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_read_and_write_through_asgi(self, make_recipes):
+        recipes = make_recipes(2)
+        client = AsyncClient()
+
+        response = async_to_sync(client.get)('/api/recipes/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 2
+        # Запросы к БД посчитаны в потоке пула.
+        assert 'desc="0 queries"' not in response['Server-Timing']
+
+        response = async_to_sync(client.get)(f'/api/recipes/{recipes[0].id}/')
+        assert response.json()['name'] == recipes[0].name
+
+        response = async_to_sync(client.post)('/api/recipes/', {})
+        assert response.status_code == 401
@@ -0,0 +1,24 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import Recipe
+from users.models import User
+
+
+@pytest.mark.django_db(transaction=True)
+def test_generate_and_benchmark(tmp_path):
+    call_command('generate_load_data', users=5, recipes=20,
+                 ingredients_per_recipe=3, stdout=io.StringIO())
+    assert User.objects.count() == 5
+    assert Recipe.objects.count() == 20
+
+    output = tmp_path / 'baseline.json'
+    call_command('benchmark_api', iterations=2, warmup=0,
+                 output=str(output), stdout=io.StringIO())
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['recipes_list']['status'] == 200
+    assert report['subscriptions']['queries'] > 0
+    assert {'p50_ms', 'p95_ms'} <= set(report['download_shopping_cart'])
@@ -0,0 +1,41 @@
+import pytest
+from django.db import transaction
+
+from recipes.ingredient_index import get_version
+from recipes.models import Ingredient
+
+
+class TestIngredientSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_prefix_search(self, client):
+        for name in ('молоко', 'Молоко топлёное', 'мёд', 'соль'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+        response = client.get('/api/ingredients/?name=мол')
+        assert response.status_code == 200
+        names = [item['name'] for item in response.json()]
+        assert names == ['молоко', 'Молоко топлёное']
+
+        response = client.get('/api/ingredients/?name=мол&limit=1')
+        assert [item['name'] for item in response.json()] == ['молоко']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_prefix_search_sees_new_ingredients(self, client):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        response = client.get('/api/ingredients/?name=со')
+        assert len(response.json()) == 1
+
+        Ingredient.objects.create(name='соус', measurement_unit='мл')
+        response = client.get('/api/ingredients/?name=со')
+        assert [item['name'] for item in response.json()] == ['соль', 'соус']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_index_invalidated_after_commit(self):
+        version = get_version()
+        with transaction.atomic():
+            Ingredient.objects.create(name='соль', measurement_unit='г')
+            # Параллельный запрос не должен перестроить индекс по данным
+            # до коммита и закешировать его под новой версией.
+            assert get_version() == version
+        assert get_version() != version
@@ -0,0 +1,56 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from recipes.loaders import iter_json_array
+from recipes.models import Ingredient, Recipe
+
+
+class TestIngredientLoader:
+
+    @pytest.mark.parametrize('read_size', (1, 5, 1024))
+    def test_iter_json_array_matches_json_load(self, read_size):
+        data = [{'name': 'соль', 'measurement_unit': 'г'}, 1, 'a', [2, {}]]
+        file = io.StringIO(json.dumps(data, ensure_ascii=False))
+        assert list(iter_json_array(file, read_size)) == data
+
+    @pytest.mark.django_db
+    def test_upsert_adds_only_missing(self, tmp_path):
+        path = tmp_path / 'ingredients.csv'
+        path.write_text('соль,г\nсахар,г\nсоль,г\n', encoding='utf-8')
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+
+        call_command('json_to_model', file=str(path), upsert=True,
+                     stdout=io.StringIO())
+        assert sorted(
+            Ingredient.objects.values_list('name', flat=True)
+        ) == ['сахар', 'соль']
+
+
+class TestFixtureLoader:
+
+    @pytest.mark.django_db
+    def test_load_fixture_keeps_pub_date_and_links(self, tmp_path, user):
+        fixture = [
+            {'model': 'recipes.taginrecipe', 'pk': 1,
+             'fields': {'recipe': 1, 'tag': 1}},
+            {'model': 'recipes.recipe', 'pk': 1, 'fields': {
+                'name': 'Каша', 'text': 'Сварить', 'image': 'recipe/1.png',
+                'cooking_time': 10, 'author': user.pk,
+                'pub_date': '2023-03-13T20:00:00Z'}},
+            {'model': 'recipes.tag', 'pk': 1, 'fields': {
+                'name': 'Завтрак', 'color': 'Coral', 'slug': 'breakfast'}},
+        ]
+        path = tmp_path / 'fixture.json'
+        path.write_text(json.dumps(fixture), encoding='utf-8')
+
+        for _ in range(2):
+            call_command('load_fixture', str(path), batch_size=1,
+                         stdout=io.StringIO())
+
+        recipe = Recipe.objects.get(pk=1)
+        assert recipe.pub_date.isoformat() == '2023-03-13T20:00:00+00:00'
+        assert list(recipe.tags.values_list('slug', flat=True)) == [
+            'breakfast']
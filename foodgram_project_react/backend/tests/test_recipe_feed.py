@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from recipes.models import Recipe
+from users.models import Subscription
+
+
+def walk_feed(client, limit):
+    ids = []
+    url = f'/api/recipes/feed/?limit={limit}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return ids
+
+
+def spread_pub_dates():
+    """Разные даты публикации и несколько совпадающих."""
+    now = timezone.now()
+    for index, recipe in enumerate(Recipe.objects.order_by('id')):
+        recipe.pub_date = now - timedelta(minutes=(index * 7) % 5)
+        recipe.save(update_fields=('pub_date',))
+
+
+class TestRecipeFeed:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feed_matches_database_order(self, settings, user, user_client,
+                                         make_authors, django_user_model):
+        make_authors(3, recipes_per_author=4)
+        stranger = django_user_model.objects.create_user(
+            username='stranger', email='stranger@foodgram.fake')
+        Recipe.objects.create(author=stranger, name='Чужой', text='Текст',
+                              cooking_time=5)
+        spread_pub_dates()
+        expected = list(
+            Recipe.objects.filter(author__author__user=user)
+            .values_list('id', flat=True)
+        )
+
+        assert walk_feed(user_client, limit=5) == expected
+        # Маленькие списки авторов: хвост ленты дочитывается из БД.
+        settings.RECIPE_FEED_AUTHOR_DEPTH = 2
+        settings.RECIPE_FEED_TIMELINE_SIZE = 3
+        cache.clear()
+        assert walk_feed(user_client, limit=2) == expected
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feed_sees_new_recipes_and_unsubscribe(self, user, user_client,
+                                                   make_authors):
+        first, second = make_authors(2, recipes_per_author=1)
+        assert len(walk_feed(user_client, limit=10)) == 2
+
+        recipe = Recipe.objects.create(author=first, name='Новый',
+                                       text='Текст', cooking_time=5)
+        assert walk_feed(user_client, limit=10)[0] == recipe.id
+
+        Subscription.objects.filter(user=user, author=second).delete()
+        assert len(walk_feed(user_client, limit=10)) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feed_requires_auth(self, client):
+        assert client.get('/api/recipes/feed/').status_code == 401
@@ -0,0 +1,49 @@
+import pytest
+
+from recipes.models import Favorite, ShoppingCart
+
+
+class TestRecipeFilters:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_is_favorited_filter(self, user, user_client, make_recipes):
+        recipes = make_recipes(4)
+        Favorite.objects.create(user=user, recipe=recipes[1])
+
+        response = user_client.get('/api/recipes/?is_favorited=1')
+        assert response.status_code == 200
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == [recipes[1].id]
+
+        response = user_client.get('/api/recipes/?is_favorited=0')
+        assert response.status_code == 200
+        data = response.json()
+        ids = [item['id'] for item in data['results']]
+        assert recipes[1].id not in ids
+        assert data['count'] == 3, (
+            'Проверьте, что фильтр `is_favorited=0` не ломает пагинацию'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_is_in_shopping_cart_filter(self, user, user_client,
+                                        make_recipes):
+        recipes = make_recipes(3)
+        response = user_client.post(
+            f'/api/recipes/{recipes[0].id}/shopping_cart/')
+        assert response.status_code == 201
+
+        response = user_client.get('/api/recipes/?is_in_shopping_cart=1')
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == [recipes[0].id]
+
+        response = user_client.post(
+            f'/api/recipes/{recipes[0].id}/shopping_cart/')
+        assert response.status_code == 400
+
+        response = user_client.delete(
+            f'/api/recipes/{recipes[0].id}/shopping_cart/')
+        assert response.status_code == 204
+        assert not ShoppingCart.objects.filter(user=user).exists()
+
+        response = user_client.get('/api/recipes/?is_in_shopping_cart=1')
+        assert response.json()['results'] == []
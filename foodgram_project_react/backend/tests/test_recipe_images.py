@@ -0,0 +1,126 @@
+import base64
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def large_image_base64():
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 600), 'orange').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_renditions_built_after_commit(settings, user_client, ingredients,
+                                       tag, large_image_base64):
+    settings.RECIPE_IMAGE_WORKERS = 0
+    data = {
+        'name': 'Омлет',
+        'text': 'Взбить и пожарить',
+        'cooking_time': 10,
+        'image': large_image_base64,
+        'tags': [tag.id],
+        'ingredients': [{'id': ingredients[0].id, 'amount': 2}],
+    }
+    response = user_client.post('/api/recipes/', data=data, format='json')
+    assert response.status_code == 201, response.json()
+
+    recipe = Recipe.objects.get(pk=response.json()['id'])
+    with Image.open(recipe.image_thumbnail) as thumbnail:
+        assert thumbnail.size == settings.RECIPE_THUMBNAIL_SIZE
+        assert thumbnail.format == 'WEBP'
+    with Image.open(recipe.image_medium) as medium:
+        assert medium.size == (800, 400)
+
+    response = user_client.get(f'/api/recipes/{recipe.pk}/')
+    assert response.json()['image_thumbnail'].endswith(
+        recipe.image_thumbnail.url)
+
+    previous = (recipe.image_thumbnail.name, recipe.image_medium.name)
+    response = user_client.patch(
+        f'/api/recipes/{recipe.pk}/', data=data, format='json')
+    assert response.status_code == 200, response.json()
+    recipe.refresh_from_db()
+    storage = recipe.image.storage
+    assert recipe.image_thumbnail.name not in previous
+    assert not any(storage.exists(name) for name in previous)
+
+
+def make_payload(image, tag, ingredient):
+    return {
+        'name': 'Омлет',
+        'text': 'Взбить и пожарить',
+        'cooking_time': 10,
+        'image': image,
+        'tags': [tag.id],
+        'ingredients': [{'id': ingredient.id, 'amount': 2}],
+    }
+
+
+def test_stream_parser_decodes_image_in_chunks(large_image_base64):
+    from api.parsers import JSONObjectReader
+
+    body = json.dumps({'name': 'Омлет', 'image': large_image_base64,
+                       'tags': [1, 2]}).replace('/', '\\/')
+    reader = JSONObjectReader(io.StringIO(body), ('image',), read_size=7)
+    data = reader.parse()
+    assert data['name'] == 'Омлет' and data['tags'] == [1, 2]
+    with Image.open(data['image']) as image:
+        assert image.size == (1200, 600)
+
+
+@pytest.mark.parametrize('body', (
+    '{"a": 1 "b": 2}', '{"a": 1,, "b": 2}', '{, "a": 1}', '{"a": 1,}',
+    '{1: 2}', '{"a": 1} x', '{"a": 1}}', '{"a": 1', '{"a" 1}',
+))
+def test_stream_parser_rejects_invalid_objects(body):
+    from api.parsers import JSONObjectReader
+    from rest_framework.exceptions import ParseError
+
+    with pytest.raises((ParseError, ValueError)):
+        JSONObjectReader(io.StringIO(body), ('image',), read_size=3).parse()
+
+
+@pytest.mark.parametrize('body', ('{}', ' { } \n', '{"a": {"b": [1, 2]}}'))
+def test_stream_parser_accepts_valid_objects(body):
+    from api.parsers import JSONObjectReader
+
+    assert JSONObjectReader(io.StringIO(body), ('image',),
+                            read_size=3).parse() == json.loads(body)
+
+
+@pytest.mark.django_db
+def test_invalid_json_body_is_bad_request(user_client):
+    response = user_client.post('/api/recipes/', data='{"name": "Омлет",}',
+                                content_type='application/json')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_image_limits(settings, user_client, ingredients, tag,
+                      large_image_base64):
+    settings.RECIPE_IMAGE_MAX_DIMENSIONS = (1000, 1000)
+    response = user_client.post(
+        '/api/recipes/', format='json',
+        data=make_payload(large_image_base64, tag, ingredients[0]))
+    assert response.status_code == 400
+    assert 'image' in response.json()
+
+    settings.RECIPE_IMAGE_MAX_DIMENSIONS = (2000, 2000)
+    settings.RECIPE_IMAGE_MAX_BYTES = 100
+    response = user_client.post(
+        '/api/recipes/', format='json',
+        data=make_payload(large_image_base64, tag, ingredients[0]))
+    assert response.status_code == 400
+    assert 'image' in response.json()
+
+    response = user_client.post(
+        '/api/recipes/', format='json',
+        data=make_payload('data:image/png;base64,!!!', tag, ingredients[0]))
+    assert response.status_code == 400
@@ -0,0 +1,105 @@
+import pytest
+
+from api.views import RecipeViewSet
+from recipes.matching import build_state, match_index, mark_recipes_changed
+from recipes.models import IngredientInRecipe, Recipe
+
+
+def match(client, ingredients, query=''):
+    ids = ','.join(str(ingredient.id) for ingredient in ingredients)
+    response = client.get(f'/api/recipes/match/?ingredients={ids}{query}')
+    assert response.status_code == 200, response.json()
+    return [(item['id'], item['coverage'])
+            for item in response.json()['results']]
+
+
+def make_recipe(user, ingredients, name='Рецепт'):
+    recipe = Recipe.objects.create(author=user, name=name, text='Текст',
+                                   cooking_time=10)
+    IngredientInRecipe.objects.bulk_create(
+        IngredientInRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+        for ingredient in ingredients
+    )
+    return recipe
+
+
+class TestRecipeMatch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_ranked_by_coverage(self, client, user, ingredients):
+        full = make_recipe(user, ingredients[:2])
+        half = make_recipe(user, ingredients[1:3])
+        bigger_half = make_recipe(user, ingredients[:4])
+        make_recipe(user, ingredients[4:])
+
+        assert match(client, ingredients[:2]) == [
+            (full.id, 1.0), (bigger_half.id, 0.5), (half.id, 0.5)]
+        response = client.get('/api/recipes/match/?ingredients=a')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recipe_deleted_after_lookup(self, client, user, ingredients,
+                                         monkeypatch):
+        kept = make_recipe(user, ingredients[:1])
+        deleted = make_recipe(user, ingredients[:2])
+        paginate = RecipeViewSet.paginate_queryset
+
+        def delete_after_lookup(viewset, matches):
+            page = paginate(viewset, matches)
+            Recipe.objects.filter(pk=deleted.pk).delete()
+            return page
+
+        monkeypatch.setattr(RecipeViewSet, 'paginate_queryset',
+                            delete_after_lookup)
+        assert match(client, ingredients[:1]) == [(kept.id, 1.0)]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_incremental_update(self, user_client, user, ingredients, tag,
+                                image_base64):
+        recipe = make_recipe(user, ingredients[:2])
+        assert match(user_client, ingredients[:1]) == [(recipe.id, 0.5)]
+        state = match_index._state
+
+        data = {
+            'name': 'Омлет',
+            'text': 'Взбить и пожарить',
+            'cooking_time': 10,
+            'image': image_base64,
+            'tags': [tag.id],
+            'ingredients': [{'id': ingredients[0].id, 'amount': 2}],
+        }
+        response = user_client.post('/api/recipes/', data=data,
+                                    format='json')
+        assert response.status_code == 201, response.json()
+        created = response.json()['id']
+        assert match(user_client, ingredients[:1]) == [
+            (created, 1.0), (recipe.id, 0.5)]
+        assert match(user_client, ingredients[:1], '&tags=breakfast') == [
+            (created, 1.0)]
+
+        recipe.delete()
+        assert match(user_client, ingredients[:1]) == [(created, 1.0)]
+        # Изменения применены к индексу, а не перестроением.
+        assert match_index._state.version == state.version
+        assert match_index._state.seq == state.seq + 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_changes_match_full_build(self, user, ingredients):
+        recipes = [make_recipe(user, ingredients[i:i + 3]) for i in range(3)]
+        match_index.match([ingredients[0].id], 10)
+
+        IngredientInRecipe.objects.filter(recipe=recipes[0]).delete()
+        IngredientInRecipe.objects.create(
+            recipe=recipes[0], ingredient=ingredients[4], amount=1)
+        Recipe.objects.filter(pk=recipes[2].pk).delete()
+        mark_recipes_changed([recipes[0].id, recipes[2].id])
+
+        query = [ingredient.id for ingredient in ingredients]
+        state = match_index._state
+        incremental = match_index.match(query, 10)
+        assert match_index._state is not state
+        match_index._state = build_state(state.version,
+                                         match_index._state.seq)
+        assert incremental == match_index.match(query, 10)
+        assert incremental == [(recipes[1].id, 1.0, 3),
+                               (recipes[0].id, 1.0, 1)]
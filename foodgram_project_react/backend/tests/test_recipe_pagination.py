@@ -0,0 +1,43 @@
+import pytest
+from django.utils import timezone
+
+from recipes.models import Recipe
+
+
+class TestRecipePagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_page_number_limit(self, client, make_recipes):
+        make_recipes(5)
+        response = client.get('/api/recipes/?page=2&limit=2')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 5
+        assert len(data['results']) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cursor_walks_feed(self, client, make_recipes):
+        recipes = make_recipes(5)
+        # Одинаковое время публикации: порядок решает id.
+        Recipe.objects.filter(
+            id__in=[recipe.id for recipe in recipes[1:4]]
+        ).update(pub_date=timezone.now())
+        expected = list(Recipe.objects.values_list('id', flat=True))
+
+        seen = []
+        url = '/api/recipes/?cursor=&limit=2'
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data
+            seen.extend(item['id'] for item in data['results'])
+            url = data['next']
+
+        assert seen == expected
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalid_cursor(self, client, make_recipes):
+        make_recipes(1)
+        response = client.get('/api/recipes/?cursor=broken')
+        assert response.status_code == 404
@@ -0,0 +1,76 @@
+import pytest
+
+from recipes.models import Favorite, Recipe
+from recipes.user_state import get_recipe_state
+
+
+class TestRecipePopularity:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_counters_follow_actions(self, user_client, make_recipes):
+        recipe = make_recipes(1)[0]
+        url = f'/api/recipes/{recipe.id}/'
+
+        assert user_client.post(url + 'favorite/').status_code == 201
+        assert user_client.post(url + 'shopping_cart/').status_code == 201
+        recipe.refresh_from_db()
+        assert (recipe.favorites_count, recipe.in_carts_count) == (1, 1)
+
+        assert user_client.delete(url + 'favorite/').status_code == 204
+        assert user_client.delete(url + 'favorite/').status_code == 400
+        recipe.refresh_from_db()
+        assert (recipe.favorites_count, recipe.in_carts_count) == (0, 1)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_duplicate_with_stale_state(self, user, user_client,
+                                        make_recipes):
+        recipe = make_recipes(1)[0]
+        # Состояние закешировано до добавления в другом процессе.
+        get_recipe_state(user)
+        Favorite.objects.bulk_create([Favorite(user=user, recipe=recipe)])
+
+        response = user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+        assert response.status_code == 400
+        recipe.refresh_from_db()
+        assert recipe.favorites_count == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_save_keeps_concurrent_counters(self, user_client, make_recipes):
+        recipe = make_recipes(1)[0]
+        stale = Recipe.objects.get(pk=recipe.pk)
+        assert user_client.post(
+            f'/api/recipes/{recipe.id}/favorite/').status_code == 201
+
+        stale.name = 'Новое название'
+        stale.save()
+        response = user_client.patch(
+            f'/api/recipes/{recipe.id}/', data={'cooking_time': 15},
+            format='json')
+        assert response.status_code == 200, response.json()
+        recipe.refresh_from_db()
+        assert (recipe.name, recipe.favorites_count) == ('Новое название', 1)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_ordering_by_popularity(self, client, make_recipes):
+        recipes = make_recipes(3)
+        for count, recipe in zip((5, 9, 1), recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(favorites_count=count)
+
+        response = client.get('/api/recipes/?ordering=-popularity&cursor=')
+        assert response.status_code == 200
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == [recipes[1].id, recipes[0].id, recipes[2].id]
+
+        response = client.get('/api/recipes/?ordering=likes')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_reconcile_counters(self, user, make_recipes):
+        recipes = make_recipes(2)
+        Favorite.objects.create(user=user, recipe=recipes[0])
+        Recipe.objects.filter(pk=recipes[1].pk).update(favorites_count=7)
+
+        assert Recipe.objects.reconcile_counters(batch_size=1) == 2
+        assert dict(Recipe.objects.values_list('id', 'favorites_count')) == {
+            recipes[0].id: 1, recipes[1].id: 0}
+        assert Recipe.objects.reconcile_counters() == 0
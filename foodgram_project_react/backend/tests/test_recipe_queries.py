@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, ShoppingCart
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что `{url}` возвращает статус 200'
+    )
+    return len(context.captured_queries)
+
+
+class TestRecipeQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recipe_list_constant_queries(self, user, user_client,
+                                          make_recipes):
+        first, = make_recipes(1)
+        Favorite.objects.create(user=user, recipe=first)
+        one_recipe = count_queries(user_client, '/api/recipes/')
+
+        for recipe in make_recipes(5):
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+        full_page = count_queries(user_client, '/api/recipes/')
+
+        assert one_recipe == full_page, (
+            'Проверьте, что количество запросов к БД на `/api/recipes/` '
+            'не зависит от количества рецептов на странице'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recipe_list_anonymous_constant_queries(self, client,
+                                                    make_recipes):
+        make_recipes(1)
+        one_recipe = count_queries(client, '/api/recipes/')
+        make_recipes(5)
+        full_page = count_queries(client, '/api/recipes/')
+
+        assert one_recipe == full_page, (
+            'Проверьте, что количество запросов к БД на `/api/recipes/` '
+            'не зависит от количества рецептов на странице'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recipe_flags(self, user, user_client, make_recipes):
+        favorite, in_cart = make_recipes(2)
+        Favorite.objects.create(user=user, recipe=favorite)
+        ShoppingCart.objects.create(user=user, recipe=in_cart)
+
+        response = user_client.get(f'/api/recipes/{favorite.id}/')
+        data = response.json()
+        assert data['is_favorited'] is True
+        assert data['is_in_shopping_cart'] is False
+        assert len(data['ingredients']) == 5
+
+        response = user_client.get(f'/api/recipes/{in_cart.id}/')
+        data = response.json()
+        assert data['is_favorited'] is False
+        assert data['is_in_shopping_cart'] is True
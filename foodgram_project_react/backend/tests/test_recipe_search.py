@@ -0,0 +1,85 @@
+import pytest
+
+from recipes import search
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+
+
+def search_ids(client, query):
+    response = client.get(f'/api/recipes/?search={query}')
+    assert response.status_code == 200
+    return [item['id'] for item in response.json()['results']]
+
+
+class TestRecipeSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_ranking_by_field(self, client, user):
+        pumpkin = Ingredient.objects.create(name='Тыква', measurement_unit='г')
+        by_text = Recipe.objects.create(
+            author=user, name='Суп', text='Подавать с тыквой',
+            cooking_time=10)
+        by_ingredient = Recipe.objects.create(
+            author=user, name='Каша', text='Варить', cooking_time=10)
+        IngredientInRecipe.objects.create(
+            recipe=by_ingredient, ingredient=pumpkin, amount=100)
+        by_name = Recipe.objects.create(
+            author=user, name='Тыквенный пирог', text='Печь', cooking_time=10)
+        Recipe.objects.create(
+            author=user, name='Омлет', text='Жарить', cooking_time=10)
+
+        assert search_ids(client, 'тыкв') == [
+            by_name.id, by_ingredient.id, by_text.id]
+        assert search_ids(client, 'тыкв каша') == [by_ingredient.id]
+        assert search_ids(client, 'банан') == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_search_with_filters(self, client, make_recipes, make_authors):
+        recipes = make_recipes(2)
+        author = make_authors(1)[0]
+
+        ids = search_ids(client, 'рецепт')
+        assert set(recipes[i].id for i in range(2)) < set(ids)
+        assert len(ids) == 5
+        response = client.get(
+            f'/api/recipes/?search=рецепт&author={author.id}')
+        assert {item['author']['id'] for item in response.json()[
+            'results']} == {author.id}
+        assert len(search_ids(client, 'рецепт&tags=breakfast')) == 2
+
+    def test_prefix_query(self):
+        assert search.prefix_query('Тыкв, суп!') == 'тыкв:* & суп:*'
+        assert search.prefix_query(':* & |') == ''
+        # «ё» нормализуется, как в поисковом документе.
+        assert search.prefix_query('Ёжик со свёклой') == (
+            'ежик:* & со:* & свеклой:*'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_created_recipe_is_searchable(self, user_client, ingredients,
+                                          tag, image_base64, monkeypatch):
+        updates = []
+        update_search_documents = search.update_search_documents
+        monkeypatch.setattr(
+            search, 'update_search_documents',
+            lambda recipe_ids=None: (updates.append(recipe_ids),
+                                     update_search_documents(recipe_ids)))
+        assert search_ids(user_client, 'шарлотка') == []
+        data = {
+            'name': 'Шарлотка',
+            'text': 'Яблоки и тесто',
+            'cooking_time': 40,
+            'image': image_base64,
+            'tags': [tag.id],
+            'ingredients': [{'id': ingredients[0].id, 'amount': 3}],
+        }
+        response = user_client.post('/api/recipes/', data=data,
+                                    format='json')
+        assert response.status_code == 201, response.json()
+        recipe_id = response.json()['id']
+        assert updates == [{recipe_id}]
+
+        assert search_ids(user_client, 'шарлотка') == [recipe_id]
+        assert search_ids(user_client, 'ингредиент') == [recipe_id]
+
+        Ingredient.objects.filter(pk=ingredients[0].pk).delete()
+        assert search_ids(user_client, 'ингредиент') == []
@@ -0,0 +1,64 @@
+import pytest
+
+from recipes.models import IngredientInRecipe
+
+
+class TestRecipeWrite:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_create_and_update_ingredients(self, user_client, ingredients,
+                                           tag, image_base64):
+        data = {
+            'name': 'Омлет',
+            'text': 'Взбить и пожарить',
+            'cooking_time': 10,
+            'image': image_base64,
+            'tags': [tag.id],
+            'ingredients': [
+                {'id': ingredients[0].id, 'amount': 2},
+                {'id': ingredients[1].id, 'amount': 100},
+            ],
+        }
+        response = user_client.post('/api/recipes/', data=data,
+                                    format='json')
+        assert response.status_code == 201, response.json()
+        recipe_id = response.json()['id']
+        assert len(response.json()['ingredients']) == 2
+
+        data['ingredients'] = [
+            {'id': ingredients[1].id, 'amount': 150},
+            {'id': ingredients[2].id, 'amount': 1},
+        ]
+        response = user_client.patch(f'/api/recipes/{recipe_id}/',
+                                     data=data, format='json')
+        assert response.status_code == 200, response.json()
+        amounts = dict(
+            IngredientInRecipe.objects.filter(recipe_id=recipe_id)
+            .values_list('ingredient_id', 'amount')
+        )
+        assert amounts == {ingredients[1].id: 150, ingredients[2].id: 1}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalid_ingredients(self, user_client, ingredients, tag,
+                                 image_base64):
+        data = {
+            'name': 'Омлет',
+            'text': 'Взбить и пожарить',
+            'cooking_time': 10,
+            'image': image_base64,
+            'tags': [tag.id],
+            'ingredients': [
+                {'id': ingredients[0].id, 'amount': 2},
+                {'id': ingredients[0].id, 'amount': 3},
+            ],
+        }
+        response = user_client.post('/api/recipes/', data=data,
+                                    format='json')
+        assert response.status_code == 400
+        assert 'ingredients' in response.json()
+
+        data['ingredients'] = [{'id': 100500, 'amount': 2}]
+        response = user_client.post('/api/recipes/', data=data,
+                                    format='json')
+        assert response.status_code == 400
+        assert 'ingredients' in response.json()
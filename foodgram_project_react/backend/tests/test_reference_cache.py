@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.mixins import get_reference_version
+from recipes.models import Tag
+
+
+class TestReferenceCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_tags_cached_with_etag(self, client, tag):
+        response = client.get('/api/tags/')
+        assert response.status_code == 200
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/tags/')
+        assert response.status_code == 200
+        assert response['ETag'] == etag
+        assert len(context.captured_queries) == 0, (
+            'Проверьте, что повторный запрос к `/api/tags/` '
+            'не обращается к БД'
+        )
+
+        response = client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_tags_cache_invalidated(self, client, tag):
+        etag = client.get('/api/tags/')['ETag']
+
+        Tag.objects.create(name='Обед', color='#49B64E', slug='lunch')
+
+        response = client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert len(response.json()) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_version_bumped_after_commit(self, tag):
+        version = get_reference_version(Tag)
+        with transaction.atomic():
+            Tag.objects.create(name='Обед', color='#49B64E', slug='lunch')
+            assert get_reference_version(Tag) == version
+        assert get_reference_version(Tag) != version
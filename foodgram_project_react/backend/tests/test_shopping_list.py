@@ -0,0 +1,122 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import (Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart)
+from recipes.shopping_list import (aggregate, get_shopping_list,
+                                   shopping_list_key)
+
+URL = '/api/recipes/download_shopping_cart/?format=txt'
+
+
+def row(name, unit, amount):
+    return {'name': name, 'measurement_unit': unit, 'amount': amount}
+
+
+def test_aggregate_merges_compatible_units():
+    rows = aggregate([
+        row('Мука', 'г', 300),
+        row('мука', 'кг', 1),
+        row('Молоко', 'л', 1),
+        row('Молоко', 'мл', 250),
+        row('Соль', 'г', 5),
+        row('Соль', 'ч. л.', 2),
+        row('Сахар', 'мг', 1500),
+        row('Яйцо', 'шт', 2),
+        row('яйцо', 'ШТ.', 1),
+    ])
+    assert [(item['name'], item['amount'], item['measurement_unit'])
+            for item in rows] == [
+        ('Мука', Decimal('1.3'), 'кг'),
+        ('Молоко', Decimal('1.25'), 'л'),
+        ('Соль', 5, 'г'),
+        ('Соль', 2, 'ч. л.'),
+        ('Сахар', Decimal('1.5'), 'г'),
+        ('Яйцо', 3, 'шт'),
+    ]
+
+
+class TestShoppingListDownload:
+
+    @pytest.mark.parametrize('file_format, content_type, expected', (
+        ('txt', 'text/plain', 'Молоко, 1.5 л'.encode()),
+        ('csv', 'text/csv', 'Молоко,1.5,л'.encode()),
+        ('pdf', 'application/pdf', b'%PDF'),
+    ), ids=('txt', 'csv', 'pdf'))
+    @pytest.mark.django_db(transaction=True)
+    def test_formats(self, user, user_client, file_format, content_type,
+                     expected):
+        recipe = Recipe.objects.create(author=user, name='Каша', text='Т',
+                                       cooking_time=10)
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe,
+                ingredient=Ingredient.objects.create(
+                    name='Молоко', measurement_unit=unit),
+                amount=amount
+            )
+            for unit, amount in (('л', 1), ('мл', 500))
+        )
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get(
+                f'/api/recipes/download_shopping_cart/?format={file_format}')
+            content = b''.join(response.streaming_content)
+        # Проверка токена и один запрос списка покупок.
+        assert len(queries) == 2
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith(content_type)
+        assert response['Content-Disposition'] == (
+            f'attachment; filename=shopping-list.{file_format}'
+        )
+        assert expected in content
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cached_and_invalidated(self, user, user_client):
+        milk_l = Ingredient.objects.create(name='Молоко',
+                                           measurement_unit='л')
+        milk_ml = Ingredient.objects.create(name='Молоко',
+                                            measurement_unit='мл')
+        recipe = Recipe.objects.create(author=user, name='Каша', text='Т',
+                                       cooking_time=10)
+        IngredientInRecipe.objects.bulk_create((
+            IngredientInRecipe(recipe=recipe, ingredient=milk_l, amount=1),
+            IngredientInRecipe(recipe=recipe, ingredient=milk_ml,
+                               amount=500),
+        ))
+        url = f'/api/recipes/{recipe.id}/shopping_cart/'
+        assert user_client.post(url).status_code == 201
+
+        response = user_client.get(URL)
+        assert 'Молоко, 1.5 л' in b''.join(response.streaming_content
+                                           ).decode()
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get(URL)
+            content = b''.join(response.streaming_content).decode()
+        # Остаётся только проверка токена.
+        assert len(queries) == 1
+        assert 'Молоко, 1.5 л' in content
+
+        milk_ml.name = 'Сливки'
+        milk_ml.save()
+        content = b''.join(user_client.get(URL).streaming_content).decode()
+        assert 'Молоко, 1 л' in content and 'Сливки, 500 мл' in content
+
+        assert user_client.delete(url).status_code == 204
+        content = b''.join(user_client.get(URL).streaming_content).decode()
+        assert 'Молоко' not in content
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalidated_after_commit(self, user):
+        recipe = Recipe.objects.create(author=user, name='Каша', text='Т',
+                                       cooking_time=10)
+        get_shopping_list(user)
+        key = shopping_list_key(user.pk)
+        with transaction.atomic():
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+            assert cache.get(key) is not None
+        assert cache.get(key) is None
@@ -0,0 +1,51 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries), response.json()
+
+
+class TestSubscriptions:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_subscriptions_constant_queries(self, user_client, make_authors):
+        url = '/api/users/subscriptions/?recipes_limit=2'
+        make_authors(1)
+        one_author, _ = count_queries(user_client, url)
+        make_authors(4)
+        many_authors, data = count_queries(user_client, url)
+
+        assert one_author == many_authors, (
+            'Проверьте, что количество запросов к БД на '
+            '`/api/users/subscriptions/` не зависит от числа подписок'
+        )
+        assert data['count'] == 5
+        for author in data['results']:
+            assert author['is_subscribed'] is True
+            assert author['recipes_count'] == 3
+            assert len(author['recipes']) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recipes_limit_newest_first(self, user_client, make_authors):
+        author, = make_authors(1)
+        newest = Recipe.objects.filter(author=author).first()
+
+        response = user_client.get(
+            '/api/users/subscriptions/?recipes_limit=1')
+        recipes = response.json()['results'][0]['recipes']
+        assert [recipe['id'] for recipe in recipes] == [newest.id]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalid_recipes_limit(self, user_client, make_authors):
+        make_authors(1)
+        for value in ('abc', '-1'):
+            response = user_client.get(
+                f'/api/users/subscriptions/?recipes_limit={value}')
+            assert response.status_code == 400
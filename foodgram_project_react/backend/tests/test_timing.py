@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from foodgram_api.timing import timing_buffer, timing_stats
+
+
+@pytest.mark.django_db(transaction=True)
+def test_server_timing_and_stats(client, make_recipes, rf):
+    make_recipes(3)
+    timing_buffer.records.clear()
+
+    response = client.get('/api/recipes/')
+    header = response['Server-Timing']
+    assert 'db;dur=' in header and 'serializer;dur=' in header
+
+    data = json.loads(timing_stats(rf.get('/debug/timings/')).content)
+    assert data['RecipeViewSet.list']['count'] == 1
+    assert data['RecipeViewSet.list']['queries']['max'] > 0
+    assert sum(data['RecipeViewSet.list']['histogram_ms'].values()) == 1
+
+
+def test_stats_endpoint_disabled_by_default(client):
+    # Сводка подключается только при REQUEST_TIMING_ENDPOINT, не по DEBUG.
+    assert client.get('/debug/timings/').status_code == 404